@@ -1,107 +1,52 @@
-import os
-import pandas as pd
 import streamlit as st
 
-from sec_edgar.config import DATA_DIR
-from langchain_core.documents import Document
-from langchain_core.prompts import PromptTemplate
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_huggingface.embeddings import HuggingFaceEmbeddings
-from langchain_huggingface.llms import HuggingFaceEndpoint
-from langchain_community.vectorstores import Chroma
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain.chains import create_retrieval_chain
+from sec_edgar import metrics
 
-# Set your Hugging Face API token (set as environment variable)
-HF_TOKEN = os.environ.get("HF_TOKEN")
-
-# Streamlit app title
+# Streamlit app title (rendered before any heavy imports run)
 st.title("📊 Financial Filings RAG Assistant")
 st.write("Ask questions about company filings to gain financial insights.")
 
-# Load and cache filings data
-@st.cache_data
-def load_data():
-    data_path = os.path.join(DATA_DIR, "processed_filings.csv")
-    df = pd.read_csv(data_path)
-    return df
-
-# Create Chroma vector store
-@st.cache_resource
-def create_vector_store(df):
-    docs = []
-    for _, row in df.iterrows():
-        content = f"{row['Text']}\nTicker: {row['ticker']}\nCIK: {row['cik']}\nAccession Number: {row['accessionNumber']}"
-        metadata = {
-            "ticker": row["ticker"],
-            "cik": row["cik"],
-            "accessionNumber": row["accessionNumber"],
-            "filepath": row["filepath"]
-        }
-        docs.append(Document(page_content=content, metadata=metadata))
-
-    # Split into chunks
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    split_docs = splitter.split_documents(docs)
-
-    # Use HuggingFace embeddings
-    embedder = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2",
-        model_kwargs={"device": "cpu"},
-        encode_kwargs={"normalize_embeddings": True}
-    )
-
-    # Create Chroma vectorstore
-    vectorstore = Chroma.from_documents(documents=split_docs, embedding=embedder)
-    return vectorstore
+# Open the prebuilt Chroma index once per server process and build, shared by
+# all sessions. Keyed on the current build so a rebuild is picked up on the next
+# rerun. The app never builds it; run `python src/vector_index.py` first.
+@st.cache_resource(show_spinner="Loading filings index...")
+def get_vector_store(build_dir):
+    from vector_index import load_vector_store
+    return load_vector_store(build_dir=build_dir)
 
 # Build RAG chain
 @st.cache_resource
-def create_rag_chain(_vectorstore):
-    retriever = _vectorstore.as_retriever(search_kwargs={"k": 5})
-
-    prompt = PromptTemplate(
-        template="""
-You are a helpful assistant for analyzing SEC company filings.
-
-Use ONLY the provided context to answer the question below. Always cite the ticker and accession number.
-
-Context:
-{context}
-
-Question:
-{input}
-
-Answer:
-""",
-        input_variables=["context", "input"]
-    )
-
-    llm = HuggingFaceEndpoint(
-        repo_id="mistralai/Mixtral-8x7B-Instruct-v0.1",
-        token=HF_TOKEN,
-        max_length=2048,
-        temperature=0.1
-    )
-
-    doc_chain = create_stuff_documents_chain(llm, prompt)
-    rag_chain = create_retrieval_chain(retriever, doc_chain)
-    return rag_chain
+def get_rag_chain(build_dir, _vectorstore):
+    from rag_chain import create_rag_chain
+    return create_rag_chain(_vectorstore)
 
 # Main app logic
 def main():
-    df = load_data()
-    st.success(f"✅ Loaded {len(df)} filings")
-
-    vectorstore = create_vector_store(df)
-    rag_chain = create_rag_chain(vectorstore)
+    from vector_index import current_build
+    build_dir = current_build()
+    try:
+        if build_dir is None:
+            raise FileNotFoundError("No filings index; build it with `python src/vector_index.py`")
+        vectorstore, stats = get_vector_store(build_dir)
+    except FileNotFoundError as ex:
+        st.error(str(ex))
+        st.stop()
+    st.success(f"✅ Loaded {stats['sections']} filing sections")
+    st.caption(
+        f"Skipped {stats['skipped_sections']} duplicate sections and {stats['duplicates']} of "
+        f"{stats['total']} duplicate chunks ({stats['saved_pct']:.1f}% of chunk text not embedded)"
+    )
+    rag_chain = get_rag_chain(build_dir, vectorstore)
 
     query = st.text_input("🔍 Ask about the filings:")
     if query:
         with st.spinner("Thinking..."):
-            result = rag_chain.invoke({"input": query})
+            with metrics.timer("query"):
+                result = rag_chain.invoke({"input": query})
             st.subheader("📈 Answer")
             st.write(result["answer"])
+        if metrics.is_enabled():
+            metrics.write_metrics(fmt="prometheus")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,185 @@
+"""
+Benchmark harness for the pipeline hot paths.
+
+Runs each scenario at several corpus scales on a synthetic 10-K corpus and
+appends one JSON line per (scenario, scale) with throughput, latency
+percentiles and peak RSS, tagged with the current git commit so results can
+be compared across commits. Every scenario runs in a fresh process so peak
+RSS is its own.
+
+Usage (from the src directory):
+    python -m benchmarks.run_benchmarks --scales 10,100 --output ../logs/benchmarks.jsonl
+"""
+
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import click
+
+SCENARIOS = ["parse", "chunk", "index", "search", "download"]
+
+QUERIES = [
+    "revenue growth", "cybersecurity risk", "supply chain disruption", "liquidity and capital resources",
+    "interest rates debt covenants", "goodwill impairment", "international currency", "data privacy regulatory",
+]
+
+
+def _percentiles(latencies):
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"p50_ms": pick(0.5) * 1000, "p95_ms": pick(0.95) * 1000, "p99_ms": pick(0.99) * 1000}
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _parsed_frame(corpus_dir, df_history):
+    from sec_edgar.parser_lib import parse_10k_filing
+    import pandas as pd
+    rows = []
+    for _, row in df_history.iterrows():
+        path = os.path.join(corpus_dir, row["ticker"], row["primaryDocument"])
+        for text in parse_10k_filing(path, 0):
+            rows.append({"Text": text, "ticker": row["ticker"], "cik": row["cik"]})
+    return pd.DataFrame(rows)
+
+
+def _run_scenario(scenario, scale, paragraphs, work_dir, stub_latency=0.0, stub_error_rate=0.0):
+    """
+    Runs one scenario in the current (fresh) process and returns its result
+    record. stub_latency and stub_error_rate configure the stub EDGAR server
+    of the download scenario.
+    """
+    from benchmarks.synthetic import generate_corpus
+    from rag_app import RAGApp
+
+    corpus_dir = os.path.join(work_dir, f"corpus-{scale}-{paragraphs}")
+    df_history = generate_corpus(corpus_dir, scale, paragraphs)
+    corpus_mb = sum(
+        os.path.getsize(os.path.join(corpus_dir, t, d))
+        for t, d in zip(df_history["ticker"], df_history["primaryDocument"])
+    ) / (1024 * 1024)
+    result = {}
+
+    if scenario == "parse":
+        from sec_edgar.parser_lib import parse_10k_filing
+        latencies = []
+        start = time.perf_counter()
+        for t, d in zip(df_history["ticker"], df_history["primaryDocument"]):
+            t0 = time.perf_counter()
+            parse_10k_filing(os.path.join(corpus_dir, t, d), 0)
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - start
+        result = {"filings_per_s": scale / elapsed, "mb_per_s": corpus_mb / elapsed, **_percentiles(latencies)}
+
+    elif scenario in ("chunk", "index", "search"):
+        df = _parsed_frame(corpus_dir, df_history)
+        rag = RAGApp()
+        start = time.perf_counter()
+        chunks = rag.chunk_text(df)
+        chunk_elapsed = time.perf_counter() - start
+        if scenario == "chunk":
+            result = {"chunks": len(chunks), "chunks_per_s": len(chunks) / chunk_elapsed}
+        else:
+            start = time.perf_counter()
+            rag.create_index(chunks)
+            index_elapsed = time.perf_counter() - start
+            if scenario == "index":
+                result = {"chunks": len(chunks), "indexed": len(rag.chunks), "chunks_per_s": len(chunks) / index_elapsed}
+            else:
+                latencies = []
+                for i in range(200):
+                    t0 = time.perf_counter()
+                    rag.search_chunks(QUERIES[i % len(QUERIES)])
+                    latencies.append(time.perf_counter() - t0)
+                result = {"indexed": len(rag.chunks), "queries_per_s": len(latencies) / sum(latencies), **_percentiles(latencies)}
+
+    elif scenario == "download":
+        from benchmarks.stub_edgar import StubEdgarServer
+        from sec_edgar.downloader import sync_download_form
+        from sec_edgar import metrics
+        metrics.enable()
+        out_dir = os.path.join(work_dir, f"download-{scale}-{paragraphs}-{os.getpid()}")
+        latencies = []
+        with StubEdgarServer(latency=stub_latency, error_rate=stub_error_rate, paragraphs=paragraphs) as server:
+            start = time.perf_counter()
+            for _, row in df_history.iterrows():
+                t0 = time.perf_counter()
+                sync_download_form(row, "10-K", out_dir, server.base_url)
+                latencies.append(time.perf_counter() - t0)
+            elapsed = time.perf_counter() - start
+        shutil.rmtree(out_dir, ignore_errors=True)
+        counters = {rec["name"]: rec["value"] for rec in metrics.snapshot() if rec["type"] == "counter"}
+        result = {
+            "filings_per_s": scale / elapsed, "mb_per_s": corpus_mb / elapsed, **_percentiles(latencies),
+            "retries": int(counters.get("http_retries_total", 0)),
+            "failures": int(counters.get("download_failures_total", 0)),
+        }
+
+    else:
+        raise ValueError(f"Unknown scenario '{scenario}'")
+
+    result.update({"corpus_mb": corpus_mb, "peak_rss_mb": _peak_rss_mb()})
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@click.command()
+@click.option('--scales', default="10,100", help="Comma-separated corpus sizes (number of filings).")
+@click.option('--paragraphs', default=200, help="Paragraphs per synthetic filing (~0.9 KB each).")
+@click.option('--scenarios', default=",".join(SCENARIOS), help="Comma-separated scenarios to run.")
+@click.option('--output', default=None, type=str, help="JSON lines file to append results to.")
+@click.option('--stub-latency', default=0.0, help="Seconds the stub EDGAR server waits before each response (download scenario).")
+@click.option('--stub-error-rate', default=0.0, help="Fraction of stub EDGAR responses that are 503s, to exercise retries (download scenario).")
+def main(scales, paragraphs, scenarios, output, stub_latency, stub_error_rate):
+    """Runs the benchmark scenarios and reports throughput, latency and peak RSS."""
+    commit = _git_commit()
+    work_dir = tempfile.mkdtemp(prefix="docbot-bench-")
+    ctx = multiprocessing.get_context("spawn")
+    records = []
+    try:
+        for scale in (int(s) for s in scales.split(",")):
+            for scenario in scenarios.split(","):
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    result = pool.submit(_run_scenario, scenario, scale, paragraphs, work_dir,
+                                         stub_latency, stub_error_rate).result()
+                record = {
+                    "commit": commit, "scenario": scenario, "scale": scale, "paragraphs": paragraphs,
+                    "stub_latency": stub_latency, "stub_error_rate": stub_error_rate,
+                    "python": platform.python_version(), "ts": time.time(), **result,
+                }
+                records.append(record)
+                summary = ", ".join(f"{k}={v:.2f}" for k, v in result.items() if isinstance(v, float))
+                print(f"{scenario:>8} x{scale}: {summary}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if output:
+        with open(output, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        print(f"Results appended to {output}")
+
+
+if __name__ == "__main__":
+    main()
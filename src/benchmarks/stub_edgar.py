@@ -0,0 +1,67 @@
+"""
+Local stub of the EDGAR archive for download benchmarks.
+
+Serves /Archives/edgar/data/<cik>/<accession>/<document> by generating the
+synthetic filing for the document's seed, so downloads exercise real HTTP
+without touching sec.gov. An optional latency and error rate simulate a slow
+or throttling server (errors are returned as 503 to trigger retries).
+"""
+
+import random
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from benchmarks.synthetic import make_filing
+
+_DOC_RE = re.compile(r"^/Archives/edgar/data/\d+/\d+/syn(\d+)-10k\.htm$")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    latency = 0.0
+    error_rate = 0.0
+    paragraphs = 200
+
+    def do_GET(self):
+        match = _DOC_RE.match(self.path)
+        if self.latency:
+            time.sleep(self.latency)
+        if match is None:
+            self.send_error(404)
+            return
+        if self.error_rate and random.random() < self.error_rate:
+            self.send_error(503)
+            return
+        body = make_filing(int(match.group(1)), self.paragraphs).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubEdgarServer:
+    """
+    Threaded stub EDGAR server on localhost. Use as a context manager;
+    base_url is what to pass as the downloader's base_url.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, paragraphs=200, port=0):
+        handler = type("StubHandler", (_Handler,), {
+            "latency": latency, "error_rate": error_rate, "paragraphs": paragraphs,
+        })
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
@@ -0,0 +1,128 @@
+"""
+Synthetic 10-K corpus generator for benchmarks.
+
+Filings mimic the structure parse_10k_filing has to cope with: an iXBRL header
+of hidden facts, a table of contents repeating every Item heading, the Item 1,
+1A, 2, 7, 7A and 8 sections with prose and financial tables, and inline
+ix:nonFraction tags. Output is fully determined by the seed.
+
+Functions:
+    make_filing(seed, paragraphs): Returns the HTML of one synthetic 10-K.
+    generate_corpus(out_dir, num_filings, paragraphs, seed): Writes a corpus and its history DataFrame.
+"""
+
+import os
+import random
+import pandas as pd
+
+WORDS = (
+    "revenue customers products services market competition growth operating income "
+    "regulatory risk cybersecurity supply chain liquidity capital expenditures segment "
+    "international currency inflation interest rates debt covenants litigation intellectual "
+    "property employees facilities manufacturing distribution demand pricing margin tax "
+    "acquisition integration goodwill impairment pension climate sustainability data privacy "
+    "cloud software hardware advertising subscription retail wholesale fiscal quarter annual"
+).split()
+
+SECTIONS = [
+    ("1", "Business"),
+    ("1A", "Risk Factors"),
+    ("1B", "Unresolved Staff Comments"),
+    ("2", "Properties"),
+    ("3", "Legal Proceedings"),
+    ("7", "Management's Discussion and Analysis of Financial Condition and Results of Operations"),
+    ("7A", "Quantitative and Qualitative Disclosures About Market Risk"),
+    ("8", "Financial Statements and Supplementary Data"),
+]
+
+# Share of paragraphs given to each section; Item 1, 1A and 7 dominate real filings
+SECTION_WEIGHTS = {"1": 0.25, "1A": 0.3, "1B": 0.01, "2": 0.03, "3": 0.03, "7": 0.25, "7A": 0.05, "8": 0.08}
+
+
+def _sentence(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 25))]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng):
+    return "<p>" + " ".join(_sentence(rng) for _ in range(rng.randint(3, 7))) + "</p>"
+
+
+def _table(rng, seed):
+    rows = []
+    for r in range(rng.randint(4, 10)):
+        cells = "".join(
+            f'<td><ix:nonFraction name="us-gaap:Revenues" contextRef="c-{seed}-{r}" unitRef="usd" '
+            f'decimals="-6" scale="6">{rng.randint(100, 99999):,}</ix:nonFraction></td>'
+            for _ in range(3)
+        )
+        rows.append(f"<tr><td>{rng.choice(WORDS).capitalize()}</td>{cells}</tr>")
+    return "<table>" + "".join(rows) + "</table>"
+
+
+def _ixbrl_header(rng, seed):
+    facts = "".join(
+        f'<ix:nonNumeric name="dei:Fact{i}" contextRef="c-{seed}">{rng.choice(WORDS)}</ix:nonNumeric>'
+        for i in range(200)
+    )
+    contexts = "".join(
+        f'<xbrli:context id="c-{seed}-{i}"><xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">'
+        f'{seed:010d}</xbrli:identifier></xbrli:entity></xbrli:context>'
+        for i in range(50)
+    )
+    return f'<div style="display:none"><ix:header><ix:hidden>{facts}</ix:hidden><ix:resources>{contexts}</ix:resources></ix:header></div>'
+
+
+def make_filing(seed, paragraphs=200):
+    """
+    Returns the HTML of one synthetic 10-K with roughly `paragraphs` paragraphs
+    (about 0.9 KB each) spread across the Item sections.
+    """
+    rng = random.Random(seed)
+    toc = "".join(
+        f'<tr><td><a href="#item{num}">Item {num}.</a></td><td>{title}</td><td>{i + 3}</td></tr>'
+        for i, (num, title) in enumerate(SECTIONS)
+    )
+    body = []
+    for num, title in SECTIONS:
+        body.append(f'<div id="item{num}"><p><b>Item {num}. {title}</b></p>')
+        for _ in range(max(1, int(paragraphs * SECTION_WEIGHTS[num]))):
+            body.append(_paragraph(rng))
+            if num in ("7", "8") and rng.random() < 0.15:
+                body.append(_table(rng, seed))
+        body.append("</div>")
+    return (
+        '<html xmlns:ix="http://www.xbrl.org/2013/inlineXBRL"><head><title>10-K</title></head><body>'
+        + _ixbrl_header(rng, seed)
+        + "<p>UNITED STATES SECURITIES AND EXCHANGE COMMISSION</p><p>FORM 10-K</p>"
+        + f"<table>{toc}</table>"
+        + "".join(body)
+        + "</body></html>"
+    )
+
+
+def generate_corpus(out_dir, num_filings, paragraphs=200, seed=0):
+    """
+    Writes num_filings synthetic filings to out_dir/<ticker>/ in the layout the
+    downloader produces, and returns the matching filing history DataFrame.
+    """
+    records = []
+    for i in range(num_filings):
+        filing_seed = seed * 1_000_003 + i
+        ticker = f"SYN{i % 50}"
+        cik = 1_000_000 + i % 50
+        primary_doc = f"syn{filing_seed}-10k.htm"
+        folder = os.path.join(out_dir, ticker)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, primary_doc)
+        if not os.path.exists(path):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(make_filing(filing_seed, paragraphs))
+        records.append({
+            "accessionNumber": f"0000{cik}-24-{i:06d}",
+            "form": "10-K",
+            "primaryDocument": primary_doc,
+            "ticker": ticker,
+            "cik": cik,
+        })
+    return pd.DataFrame(records)
@@ -1,18 +1,113 @@
 # main.py
 
+import logging
 import click
-from sec_edgar.utils import get_company_tickers, pull_all_history, save_history_to_csv
-from sec_edgar.downloader import sync_download_all_forms
-from sec_edgar.config import HEADERS
-from sec_edgar.process_filings import parse_and_save_filings
+from sec_edgar import metrics
+
+# Pipeline modules pull in pandas, requests, bs4 and progiter, so they are
+# imported inside the functions that use them to keep `--help` and argument
+# errors fast.
+
+def run_shard(df_tickers, form, shard, run_id):
+    """
+    Runs the pipeline as one shard of a multi-worker refresh. CIKs are claimed
+    from the run's shared work queue (own shard first, then stolen from others)
+    and all outputs are written to the shard's directory for the run.
+    """
+    import os
+    import pandas as pd
+    from sec_edgar.config import HEADERS
+    from sec_edgar.utils import pull_all_history, save_history_to_csv
+    from sec_edgar.downloader import sync_download_all_forms
+    from sec_edgar.process_filings import parse_and_save_filings
+    from sec_edgar.sharding import (parse_shard, shard_dir, history_path, reconcile_history,
+                                    WorkQueue, MERGED_OUTPUTS)
+
+    index, num_shards = parse_shard(shard)
+    out_dir = shard_dir(run_id, index, num_shards)
+    # One history file per completed CIK, written before the CIK is marked done,
+    # so a restarted worker can rebuild the shard outputs from them.
+    os.makedirs(os.path.join(out_dir, 'history'), exist_ok=True)
+    queue = WorkQueue(num_shards, run_id)
+    queue.populate(df_tickers)
+    queue.start_heartbeat()
+
+    try:
+        for cik in queue.iter_claims(index):
+            df_company = df_tickers[df_tickers['cik'] == cik]
+            cik_history_path = history_path(out_dir, cik, queue.worker_id)
+            try:
+                df_history = pull_all_history(df_company, HEADERS)
+                df_filtered = df_history[df_history['form'] == form]
+                sync_download_all_forms(df_filtered, form, out_dir)
+                df_history.to_csv(cik_history_path, index=False)
+            except Exception as ex:
+                print(f"Shard {shard}: CIK {cik} failed: {ex}")
+                queue.complete(cik, failed=True)
+                continue
+            if not queue.complete(cik):
+                # Our lease expired and another worker took the CIK over; the
+                # reconcile step below drops our copy
+                print(f"Shard {shard}: lost lease on CIK {cik}, discarding its results")
+        # Rebuild the shard outputs from the CIKs the queue records as done by
+        # the worker that wrote them, including ones finished before a restart.
+        history_files = reconcile_history(queue, out_dir, df_tickers)
+    finally:
+        queue.close()
+
+    for name in MERGED_OUTPUTS:
+        output_path = os.path.join(out_dir, name)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    if not history_files:
+        print(f"Shard {shard}: no CIKs completed in run {run_id}.")
+        return
+
+    df_history = pd.concat([pd.read_csv(path) for path in history_files], ignore_index=True)
+    save_history_to_csv(df_history, out_dir)
+    df_filtered = df_history[df_history['form'] == form]
+    if df_filtered.empty:
+        print(f"No records found for form {form}.")
+        return
+    parse_and_save_filings(df_filtered, out_dir)
 
 @click.command()
 @click.option('--top_n', default=10, help="Number of top records to download.")
 @click.option('--form', default='10-K', help="Form type to download (e.g., '10-K').")
 @click.option('--tickers', default=None, type=str, help="Comma-separated list of tickers (e.g., 'AAPL,MSFT')")
-def main(top_n, form, tickers):
+@click.option('--shard', default=None, type=str, help="Run as shard 'i/N' of a multi-worker refresh (e.g., '0/4').")
+@click.option('--merge', 'merge_n', default=None, type=int, help="Merge the outputs of N shards into the data directory and exit.")
+@click.option('--run-id', default=None, type=str, help="Identifier shared by all shards of one refresh (required with --shard and --merge).")
+@click.option('--metrics', 'metrics_path', default=None, type=str, help="Collect stage metrics and write them to this file (.prom for Prometheus text, otherwise JSON lines).")
+@click.option('--profile', default=None, type=str, help="Comma-separated stages to sample with cProfile (e.g., 'parse,download' or 'all'); also writes metrics (default logs/metrics.jsonl).")
+def main(top_n, form, tickers, shard, merge_n, run_id, metrics_path, profile):
     """Main function to manage SEC form downloads in synchronous mode."""
-    
+
+    logging.basicConfig(level=logging.INFO)
+    if (shard or merge_n) and not run_id:
+        raise click.UsageError("--run-id is required with --shard and --merge.")
+    if metrics_path or profile:
+        metrics.enable(profile_stages=profile.split(',') if profile else None)
+    try:
+        run_pipeline(form, tickers, shard, merge_n, run_id)
+    finally:
+        # --profile alone also collects metrics; they go to the default logs/metrics.jsonl
+        if metrics.is_enabled():
+            fmt = "prometheus" if metrics_path and metrics_path.endswith(".prom") else "jsonl"
+            print(f"Metrics written to {metrics.write_metrics(metrics_path, fmt)}")
+
+def run_pipeline(form, tickers, shard, merge_n, run_id):
+    """Runs the merge step, one shard, or the full single-process pipeline."""
+    from sec_edgar.config import HEADERS
+    from sec_edgar.utils import get_company_tickers, pull_all_history, save_history_to_csv
+    from sec_edgar.downloader import sync_download_all_forms
+    from sec_edgar.process_filings import parse_and_save_filings
+    from sec_edgar.sharding import merge_shards
+
+    if merge_n:
+        merge_shards(merge_n, run_id)
+        return
+
     df_tickers = get_company_tickers()
     if tickers:
         tickers_list = [ticker.strip() for ticker in tickers.split(',')]
@@ -24,11 +119,15 @@ def main(top_n, form, tickers):
     else:
         df_tickers_filtered = df_tickers
 
+    if shard:
+        run_shard(df_tickers_filtered, form, shard, run_id)
+        return
+
     df_history = pull_all_history(df_tickers_filtered, HEADERS)
     save_history_to_csv(df_history)
     # Filter the history DataFrame for the given form type
     df_filtered = df_history[df_history['form'] == form]
-    
+
     if df_filtered.empty:
         print(f"No records found for form {form}.")
         return
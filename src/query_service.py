@@ -0,0 +1,157 @@
+"""
+Async retrieval/answer service over the persisted filings index.
+
+Endpoints:
+    POST /query    {"query": "..."} -> newline-delimited JSON stream of
+                   {"type": "sources"}, {"type": "token"}... and {"type": "done"} events.
+    GET  /health   Liveness check.
+    GET  /metrics  Prometheus text for this worker.
+
+The parent process builds the index if it is missing or stale, then pins the
+current build; every worker opens exactly that build read-only and never
+builds (see vector_index.py). Each worker serves requests concurrently on one
+event loop; retrieval runs on the
+default thread pool and answer tokens are written to the client as the LLM
+produces them. With --workers N the workers share the port via SO_REUSEPORT.
+
+Usage:
+    python src/query_service.py --port 8080 --workers 4 --llm hf
+    python src/query_service.py --llm stub   # local fake LLM for tests
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import time
+import click
+from aiohttp import web
+from sec_edgar import metrics
+
+logger = logging.getLogger(__name__)
+
+CHAIN = web.AppKey("chain", object)
+LIMITER = web.AppKey("limiter", object)
+
+
+def build_chain(llm_backend="hf", build_dir=None):
+    """
+    Opens the index read-only (build_dir, or the current build) and builds the
+    RAG chain with the given LLM backend.
+    """
+    from vector_index import load_vector_store
+    from rag_chain import create_rag_chain, get_llm
+    vectorstore, _ = load_vector_store(build_dir=build_dir)
+    return create_rag_chain(vectorstore, llm=get_llm(llm_backend))
+
+
+async def _send(response, event):
+    await response.write((json.dumps(event, default=str) + "\n").encode("utf-8"))
+
+
+async def handle_query(request):
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise web.HTTPBadRequest(text="Request body must be JSON")
+    query = body.get("query") if isinstance(body, dict) else None
+    if not isinstance(query, str) or not query.strip():
+        raise web.HTTPBadRequest(text="Missing 'query'")
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+    metrics.incr("queries_total")
+    start = time.perf_counter()
+    ttft = None
+    async with request.app[LIMITER]:
+        try:
+            async for chunk in request.app[CHAIN].astream({"input": query}):
+                if "context" in chunk:
+                    await _send(response, {"type": "sources", "sources": [doc.metadata for doc in chunk["context"]]})
+                if chunk.get("answer"):
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                        metrics.observe("ttft_seconds", ttft)
+                    await _send(response, {"type": "token", "text": chunk["answer"]})
+        except Exception as ex:
+            metrics.incr("query_errors_total")
+            logger.error("Query failed: %s", ex)
+            await _send(response, {"type": "error", "message": str(ex)})
+    total = time.perf_counter() - start
+    metrics.observe("query_seconds", total)
+    await _send(response, {
+        "type": "done",
+        "ttft_ms": ttft * 1000 if ttft is not None else None,
+        "total_ms": total * 1000,
+    })
+    await response.write_eof()
+    return response
+
+
+async def handle_health(request):
+    return web.json_response({"status": "ok"})
+
+
+async def handle_metrics(request):
+    return web.Response(text=metrics.to_prometheus(), content_type="text/plain")
+
+
+def create_app(chain, max_concurrency=64):
+    """
+    Returns the aiohttp application serving chain. At most max_concurrency
+    queries run at once per worker; the rest wait for a slot.
+    """
+    app = web.Application()
+    app[CHAIN] = chain
+    app[LIMITER] = asyncio.Semaphore(max_concurrency)
+    app.add_routes([
+        web.post("/query", handle_query),
+        web.get("/health", handle_health),
+        web.get("/metrics", handle_metrics),
+    ])
+    return app
+
+
+def _serve(host, port, llm_backend, max_concurrency, reuse_port, build_dir):
+    logging.basicConfig(level=logging.INFO)
+    metrics.enable()
+    app = create_app(build_chain(llm_backend, build_dir), max_concurrency)
+    web.run_app(app, host=host, port=port, reuse_port=reuse_port or None, print=None)
+
+
+@click.command()
+@click.option('--host', default="127.0.0.1", help="Interface to bind.")
+@click.option('--port', default=8080, help="Port to listen on.")
+@click.option('--workers', default=1, help="Number of worker processes sharing the port and index.")
+@click.option('--llm', 'llm_backend', default="hf", help="LLM backend: 'hf', 'stub' or 'module:factory'.")
+@click.option('--max-concurrency', default=64, help="Concurrent queries per worker.")
+def main(host, port, workers, llm_backend, max_concurrency):
+    """Runs the async query service."""
+    from vector_index import index_is_stale, build_vector_store, hold_build
+    if index_is_stale():
+        # Only the parent builds; workers open the pinned build read-only, so a
+        # later rebuild (e.g. after a shard merge) cannot change it under them.
+        build_vector_store()
+    # Held by the parent too, so a rebuild cannot prune it before workers open it
+    build_dir = hold_build()
+    print(f"Serving {build_dir} on http://{host}:{port} with {workers} worker(s), LLM backend '{llm_backend}'")
+    if workers == 1:
+        _serve(host, port, llm_backend, max_concurrency, False, build_dir)
+        return
+    ctx = multiprocessing.get_context("spawn")
+    procs = [
+        ctx.Process(target=_serve, args=(host, port, llm_backend, max_concurrency, True, build_dir))
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    try:
+        for proc in procs:
+            proc.join()
+    except KeyboardInterrupt:
+        for proc in procs:
+            proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
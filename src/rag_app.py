@@ -4,6 +4,8 @@ import gc
 from typing import List, Dict, Tuple
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sec_edgar.dedup import find_near_duplicates, dedup_stats
+from sec_edgar import metrics
 
 class RAGApp:
     """
@@ -22,10 +24,15 @@ class RAGApp:
         self.vectorizer = TfidfVectorizer(stop_words='english')
         self.chunks = []     # where chunks & metadata are stored
         self.matrix = None   # TF-IDF matrix of chunks
+        self.duplicates = [] # near-duplicate chunks, pointing at an indexed chunk
+        self.dedup_stats = None
 
+    @metrics.timed("chunk")
     def chunk_text(self, df: pd.DataFrame) -> List[Dict]:
         """
         Breaks input dataframe text into overlapping chunks.
+        Rows flagged as exact duplicate sections (duplicate_of) are skipped.
+        Chunks carry the row's cik, when present, so dedup stays within a company.
         """
         if 'Text' not in df.columns:
             return []
@@ -35,6 +42,9 @@ class RAGApp:
             text = row['Text']
             if not isinstance(text, str):
                 continue
+            if pd.notna(row.get('duplicate_of')):
+                continue
+            cik = row.get('cik')
 
             words = text.split()
             # If smaller than chunk_size, keep as-is
@@ -42,7 +52,8 @@ class RAGApp:
                 new_chunks.append({
                     'text': text,
                     'source': row.get('Source', f"Document {idx}"),
-                    'document_id': idx
+                    'document_id': idx,
+                    'cik': cik
                 })
                 continue
 
@@ -54,19 +65,42 @@ class RAGApp:
                     new_chunks.append({
                         'text': chunk_text,
                         'source': row.get('Source', f"Document {idx}"),
-                        'document_id': idx
+                        'document_id': idx,
+                        'cik': cik
                     })
 
+        metrics.incr("chunks_total", len(new_chunks))
         return new_chunks
 
+    @metrics.timed("index")
     def create_index(self, chunk_list: List[Dict]) -> None:
-        """Creates TF-IDF vectors from text chunks."""
+        """
+        Creates TF-IDF vectors from text chunks.
+        Near-duplicate chunks of the same company (or, without a cik, the same
+        document) are not vectorized; they are kept in self.duplicates with a
+        'duplicate_of' pointer into self.chunks.
+        """
         if not chunk_list:
             return
 
         texts = [ch['text'] for ch in chunk_list]
-        self.matrix = self.vectorizer.fit_transform(texts)
-        self.chunks = chunk_list
+        groups = [('document', ch['document_id']) if pd.isna(ch.get('cik')) else ('cik', ch['cik'])
+                  for ch in chunk_list]
+        duplicate_of = find_near_duplicates(texts, groups)
+        self.dedup_stats = dedup_stats(texts, duplicate_of)
+
+        positions = {}
+        unique_chunks, duplicates = [], []
+        for pos, (chunk, dup) in enumerate(zip(chunk_list, duplicate_of)):
+            if dup is None:
+                positions[pos] = len(unique_chunks)
+                unique_chunks.append(chunk)
+            else:
+                duplicates.append(dict(chunk, duplicate_of=positions[dup]))
+
+        self.matrix = self.vectorizer.fit_transform([ch['text'] for ch in unique_chunks])
+        self.chunks = unique_chunks
+        self.duplicates = duplicates
         gc.collect()  # force garbage collection to free memory
 
     def load_data(self, df: pd.DataFrame) -> None:
@@ -76,6 +110,7 @@ class RAGApp:
         chunked = self.chunk_text(df)
         self.create_index(chunked)
 
+    @metrics.timed("search")
     def search_chunks(self, query: str, k: int = None) -> List[Dict]:
         """
         Search for k most similar chunks to the query.
@@ -0,0 +1,80 @@
+"""
+Retrieval chain and pluggable LLM backends shared by app.py and query_service.py.
+
+Backends are looked up by name in LLM_BACKENDS ('hf' for the hosted Mixtral
+endpoint, 'stub' for a local fake that streams canned tokens, for tests and
+load runs) or given as 'module:factory' for a factory returning a langchain LLM.
+langchain is imported inside the functions to keep module import cheap.
+"""
+
+import importlib
+import os
+from sec_edgar import metrics
+
+PROMPT_TEMPLATE = """
+You are a helpful assistant for analyzing SEC company filings.
+
+Use ONLY the provided context to answer the question below. Always cite the ticker and accession number.
+
+Context:
+{context}
+
+Question:
+{input}
+
+Answer:
+"""
+
+STUB_ANSWER = "Based on the provided filings, no further information is available for this question."
+
+
+def hf_llm():
+    """Hosted Mixtral endpoint; needs HF_TOKEN in the environment."""
+    from langchain_huggingface.llms import HuggingFaceEndpoint
+    return HuggingFaceEndpoint(
+        repo_id="mistralai/Mixtral-8x7B-Instruct-v0.1",
+        token=os.environ.get("HF_TOKEN"),
+        max_length=2048,
+        temperature=0.1
+    )
+
+
+def stub_llm(sleep=0.01):
+    """Local fake LLM streaming STUB_ANSWER one character every `sleep` seconds."""
+    from langchain_core.language_models.fake import FakeStreamingListLLM
+    return FakeStreamingListLLM(responses=[STUB_ANSWER], sleep=sleep)
+
+
+LLM_BACKENDS = {
+    "hf": hf_llm,
+    "stub": stub_llm,
+}
+
+
+def get_llm(backend="hf"):
+    """Returns the LLM for a backend name or a 'module:factory' path."""
+    if backend in LLM_BACKENDS:
+        return LLM_BACKENDS[backend]()
+    if ":" not in backend:
+        raise ValueError(f"Unknown LLM backend '{backend}', expected one of {sorted(LLM_BACKENDS)} or 'module:factory'")
+    module_name, factory = backend.split(":", 1)
+    return getattr(importlib.import_module(module_name), factory)()
+
+
+def create_rag_chain(vectorstore, llm=None, k=5):
+    """Builds the retrieval + stuff-documents chain over vectorstore."""
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.runnables import RunnableLambda
+    from langchain.chains.combine_documents import create_stuff_documents_chain
+    from langchain.chains import create_retrieval_chain
+
+    base_retriever = vectorstore.as_retriever(search_kwargs={"k": k})
+
+    def retrieve(inputs):
+        with metrics.timer("retrieval"):
+            return base_retriever.invoke(inputs["input"])
+
+    retriever = RunnableLambda(retrieve)
+    prompt = PromptTemplate(template=PROMPT_TEMPLATE, input_variables=["context", "input"])
+    doc_chain = create_stuff_documents_chain(llm if llm is not None else get_llm(), prompt)
+    return create_retrieval_chain(retriever, doc_chain)
@@ -0,0 +1,123 @@
+"""
+Near-duplicate detection for parsed filing text.
+
+Consecutive filings from the same company repeat most of their Item 1 and
+Item 1A text. MinHash signatures with LSH banding find those near-duplicates
+so indexers can store a pointer to the first occurrence instead of
+re-embedding the same boilerplate. Texts are only compared within a group
+(the filer's CIK), so a duplicate always points at the same company's filing.
+
+Functions:
+    minhash_signature(text): MinHash signature of a text's word shingles.
+    find_near_duplicates(texts, groups, threshold): duplicate-of index per text (or None).
+    find_exact_duplicates(texts, groups): Same, for texts identical up to whitespace.
+    dedup_stats(texts, duplicate_of): Size/compute savings of skipping duplicates.
+"""
+
+import zlib
+from collections import defaultdict
+import numpy as np
+
+NUM_PERM = 128
+BANDS = 16
+SHINGLE_SIZE = 5
+DEFAULT_THRESHOLD = 0.85
+
+# Universal hashing (a * x + b) mod p with a fixed seed, so signatures are
+# comparable across runs and processes.
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 31, size=(NUM_PERM, 1)).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=(NUM_PERM, 1)).astype(np.uint64)
+
+
+def _shingles(text, k=SHINGLE_SIZE):
+    """Hashes the word k-grams of text into a set of 32-bit integers."""
+    words = text.lower().split()
+    if len(words) < k:
+        return {zlib.crc32(" ".join(words).encode('utf-8'))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + k]).encode('utf-8')) for i in range(len(words) - k + 1)}
+
+
+def minhash_signature(text):
+    """
+    Returns the MinHash signature of text as a uint64 array of NUM_PERM values,
+    or None if the text has no words.
+    """
+    shingles = _shingles(text)
+    if not shingles:
+        return None
+    hashes = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+    return ((_PERM_A * hashes + _PERM_B) % _MERSENNE_PRIME).min(axis=1)
+
+
+def find_near_duplicates(texts, groups=None, threshold=DEFAULT_THRESHOLD):
+    """
+    Finds near-duplicate texts using MinHash LSH.
+
+    Args:
+        texts (list): Texts in index order; earlier texts win as canonical copies.
+        groups (list): Group key per text (e.g. CIK); only texts of the same group
+            are compared. None compares all texts with each other.
+        threshold (float): Minimum estimated Jaccard similarity to count as a duplicate.
+
+    Returns:
+        list: For each text, the position of the canonical text it duplicates, or None.
+    """
+    rows = NUM_PERM // BANDS
+    buckets = defaultdict(list)
+    signatures = {}
+    duplicate_of = [None] * len(texts)
+    for pos, text in enumerate(texts):
+        if not isinstance(text, str):
+            continue
+        sig = minhash_signature(text)
+        if sig is None:
+            continue
+        group = groups[pos] if groups is not None else None
+        keys = [(group, band, sig[band * rows:(band + 1) * rows].tobytes()) for band in range(BANDS)]
+        candidates = {cand for key in keys for cand in buckets.get(key, ())}
+        best, best_sim = None, threshold
+        for cand in candidates:
+            sim = float(np.mean(signatures[cand] == sig))
+            if sim >= best_sim:
+                best, best_sim = cand, sim
+        if best is not None:
+            duplicate_of[pos] = best
+            continue
+        # Only canonical texts are indexed, so pointers never chain.
+        signatures[pos] = sig
+        for key in keys:
+            buckets[key].append(pos)
+    return duplicate_of
+
+
+def find_exact_duplicates(texts, groups=None):
+    """
+    Like find_near_duplicates, but only flags texts identical to an earlier
+    text of the same group once whitespace is normalized.
+    """
+    first_seen = {}
+    duplicate_of = [None] * len(texts)
+    for pos, text in enumerate(texts):
+        if not isinstance(text, str) or not text.strip():
+            continue
+        key = (groups[pos] if groups is not None else None, " ".join(text.split()))
+        if key in first_seen:
+            duplicate_of[pos] = first_seen[key]
+        else:
+            first_seen[key] = pos
+    return duplicate_of
+
+
+def dedup_stats(texts, duplicate_of):
+    """Summarises how much text (and thus embedding work) duplicates account for."""
+    total_chars = sum(len(t) for t in texts if isinstance(t, str))
+    dup_chars = sum(len(t) for t, d in zip(texts, duplicate_of) if d is not None)
+    return {
+        "total": len(texts),
+        "duplicates": sum(d is not None for d in duplicate_of),
+        "total_chars": total_chars,
+        "duplicate_chars": dup_chars,
+        "saved_pct": 100.0 * dup_chars / total_chars if total_chars else 0.0,
+    }
@@ -1,46 +1,50 @@
 import os
-import aiohttp
-import asyncio
 import time
 import requests
-import pandas as pd
 from progiter.manager import ProgressManager  # updated import
 from sec_edgar.config import BASE_URL, DATA_DIR, HEADERS
+from sec_edgar import metrics
 import logging
 
 # Ensure the DATA_DIR exists
 os.makedirs(DATA_DIR, exist_ok=True)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def fetch_sync_with_retries(url, retries=3, backoff_factor=2):
     """Synchronous fetch with retries."""
     for attempt in range(retries):
+        if attempt:
+            metrics.incr("http_retries_total")
         try:
-            response = requests.get(url, headers=HEADERS, timeout=10)
+            with metrics.timer("download"):
+                response = requests.get(url, headers=HEADERS, timeout=10)
+            metrics.incr("http_requests_total", status=response.status_code)
             if response.status_code == 200:
+                metrics.incr("bytes_downloaded_total", len(response.content))
                 return response.text
             elif response.status_code in {429, 500, 502, 503, 504}:
                 time.sleep(backoff_factor ** attempt)
         except requests.Timeout as e:
+            metrics.incr("http_timeouts_total")
             logger.error(f"Timeout error for URL {url}: {e}")
             time.sleep(backoff_factor ** attempt)
+    metrics.incr("download_failures_total")
     logger.error(f"Failed to fetch URL {url} after {retries} attempts")
     return None
 
-def sync_download_form(row, form):
-    """Synchronously downloads a single filing."""
+def sync_download_form(row, form, data_dir=DATA_DIR, base_url=BASE_URL):
+    """Synchronously downloads a single filing into data_dir/<ticker>."""
     cik = str(row['cik']).zfill(10)
     accession_number = row['accessionNumber'].replace('-', '')
     primary_doc = row['primaryDocument']
-    url = f"{BASE_URL}/Archives/edgar/data/{cik}/{accession_number}/{primary_doc}"
-    folder = os.path.join(DATA_DIR, row['ticker'])
+    url = f"{base_url}/Archives/edgar/data/{cik}/{accession_number}/{primary_doc}"
+    folder = os.path.join(data_dir, row['ticker'])
     os.makedirs(folder, exist_ok=True)
     file_path = os.path.join(folder, primary_doc)
     
     if os.path.exists(file_path):
+        metrics.incr("downloads_skipped_total")
         return
     
     content = fetch_sync_with_retries(url)
@@ -48,9 +52,9 @@ def sync_download_form(row, form):
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
 
-def sync_download_all_forms(df_history, form):
+def sync_download_all_forms(df_history, form, data_dir=DATA_DIR, base_url=BASE_URL):
     """Synchronously downloads filings for companies in df_history."""
     pman = ProgressManager()
     with pman:
         for _, row in pman.progiter(df_history.iterrows(), total=len(df_history), desc="Downloading filings (Sync)"):
-            sync_download_form(row, form)
+            sync_download_form(row, form, data_dir, base_url)
@@ -1,6 +1,9 @@
+import csv
 import logging
 import os
-import pandas as pd
+import queue
+import threading
+import time
 from progiter import ProgIter
 from sec_edgar.config import LOG_FILE
 
@@ -12,22 +15,118 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def log_worker(log_queue):
+# Producers block on put() once this many entries are waiting (backpressure)
+LOG_QUEUE_MAXSIZE = 10000
+# Flush policy: write when a batch is full or when the oldest unwritten entry is this old
+LOG_BATCH_SIZE = 500
+LOG_FLUSH_INTERVAL = 1.0
+
+def default_csv_log_file():
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    return os.path.join(base_dir, 'data', 'download_history.csv')
+
+def make_log_queue(maxsize=LOG_QUEUE_MAXSIZE):
+    """Returns a bounded queue for log_worker; put() blocks when it is full."""
+    return queue.Queue(maxsize=maxsize)
+
+def _read_header(csv_log_file):
+    """Returns the column names of an existing CSV log, or None for a new/empty file."""
+    if not os.path.exists(csv_log_file) or os.path.getsize(csv_log_file) == 0:
+        return None
+    with open(csv_log_file, newline='', encoding='utf-8') as f:
+        return next(csv.reader(f), None)
+
+def log_worker(log_queue, csv_log_file=None, batch_size=LOG_BATCH_SIZE, flush_interval=LOG_FLUSH_INTERVAL):
+    """
+    Continuously reads log entries (dicts) from log_queue and appends them to a CSV file.
+
+    Entries are drained in batches and written through a single open file handle,
+    flushed when batch_size entries are buffered or flush_interval seconds have
+    passed. A None entry flushes what is buffered and stops the worker.
+
+    Producers block on a full queue, so the worker must never die: a batch that
+    cannot be written is logged and dropped, and draining continues.
     """
-    Continuously reads log entries from log_queue and writes them to a CSV file.
+    csv_log_file = csv_log_file or default_csv_log_file()
+    try:
+        fieldnames = _read_header(csv_log_file)
+        f = open(csv_log_file, 'a', newline='', encoding='utf-8')
+    except OSError as ex:
+        logger.error("Cannot open download history %s, dropping log entries: %s", csv_log_file, ex)
+        fieldnames, f = None, None
+    writer = None
+    warned_columns = set()
+
+    def write_batch(batch):
+        nonlocal fieldnames, writer
+        rows = [entry for entry in batch if isinstance(entry, dict)]
+        if len(rows) < len(batch):
+            logger.warning("Dropping %d non-dict download history entries", len(batch) - len(rows))
+        if f is None or not rows:
+            return
+        if writer is None:
+            if fieldnames is None:
+                fieldnames = list(rows[0].keys())
+                csv.writer(f).writerow(fieldnames)
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+        extra = {key for row in rows for key in row} - set(fieldnames) - warned_columns
+        if extra:
+            warned_columns.update(extra)
+            logger.warning("Download history %s has no column for %s; those values are not written",
+                           csv_log_file, sorted(extra))
+        writer.writerows(rows)
+        f.flush()
+
+    try:
+        with ProgIter(desc="Logging progress") as progress_bar:
+            batch = []
+            deadline = None
+            stop = False
+            while not stop:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    log_entry = log_queue.get(timeout=timeout)
+                except queue.Empty:
+                    log_entry = False  # flush deadline reached
+                # Drain whatever else is already waiting without blocking
+                while log_entry is not False:
+                    if log_entry is None:
+                        stop = True
+                        log_queue.task_done()
+                        break
+                    batch.append(log_entry)
+                    if deadline is None:
+                        deadline = time.monotonic() + flush_interval
+                    if len(batch) >= batch_size:
+                        break
+                    try:
+                        log_entry = log_queue.get_nowait()
+                    except queue.Empty:
+                        log_entry = False
+
+                if batch and (stop or len(batch) >= batch_size or time.monotonic() >= deadline):
+                    try:
+                        write_batch(batch)
+                    except Exception as ex:
+                        logger.error("Failed to write %d download history entries: %s", len(batch), ex)
+                    for _ in batch:
+                        log_queue.task_done()
+                    progress_bar.update(len(batch))
+                    batch = []
+                    deadline = None
+    finally:
+        if f is not None:
+            f.close()
+
+def start_log_worker(csv_log_file=None, **kwargs):
     """
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    csv_log_file = os.path.join(base_dir, 'data', 'download_history.csv')
-    
-    with ProgIter(desc="Logging progress") as progress_bar:  # Removed 'unit' argument
-        while True:
-            log_entry = log_queue.get()
-            if log_entry is None:
-                break
-            df_log = pd.DataFrame([log_entry])
-            df_log.to_csv(csv_log_file, mode="a", header=not os.path.exists(csv_log_file), index=False)
-            log_queue.task_done()
-            progress_bar.update(1)
+    Starts log_worker on a daemon thread. Returns (log_queue, thread); put None
+    on the queue and join the thread to flush and stop it.
+    """
+    log_queue = make_log_queue()
+    thread = threading.Thread(target=log_worker, args=(log_queue, csv_log_file), kwargs=kwargs, daemon=True)
+    thread.start()
+    return log_queue, thread
 
 if __name__ == "__main__":
     logger.info("Logger initialized successfully.")
@@ -0,0 +1,238 @@
+"""
+Lightweight pipeline instrumentation: stage timers, counters and histograms.
+
+Metrics are off by default and every call is then a flag check returning a
+shared no-op, so instrumented hot paths pay next to nothing. Enable them with
+SEC_EDGAR_METRICS=1 or enable(), and export with write_metrics() as JSON lines
+or Prometheus text.
+
+Sampled cProfile runs can be switched on per stage with
+SEC_EDGAR_PROFILE=parse,search (or "all") and SEC_EDGAR_PROFILE_RATE=0.05;
+profiles are written to LOG_DIR/profiles as <stage>-<timestamp>.prof. Only one
+profile runs at a time per process: a sample that would start while another
+(nested or concurrent) one is active is skipped.
+
+Functions:
+    timer(stage): Context manager timing a stage into '<stage>_seconds'.
+    timed(stage): Decorator form of timer.
+    incr(name, value, **labels): Increments a counter.
+    observe(name, value): Records a value in a histogram.
+    write_metrics(path, fmt): Exports the collected metrics.
+"""
+
+import cProfile
+import functools
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from sec_edgar.config import LOG_DIR
+
+# Histogram bucket upper bounds (seconds for timers; reused for other values)
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+
+_enabled = os.environ.get("SEC_EDGAR_METRICS", "") not in ("", "0")
+_profile_stages = {s.strip() for s in os.environ.get("SEC_EDGAR_PROFILE", "").split(",") if s.strip()}
+_profile_rate = float(os.environ.get("SEC_EDGAR_PROFILE_RATE", "0.01"))
+
+_lock = threading.Lock()
+_profile_lock = threading.Lock()
+_profiling = False
+_counters = defaultdict(float)
+_histograms = {}
+
+
+def enable(profile_stages=None, profile_rate=None):
+    """Turns metric collection on, optionally profiling the given stages."""
+    global _enabled, _profile_stages, _profile_rate
+    _enabled = True
+    if profile_stages is not None:
+        _profile_stages = set(profile_stages)
+    if profile_rate is not None:
+        _profile_rate = profile_rate
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """Drops all collected metrics."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def incr(name, value=1, **labels):
+    """Increments counter name (with optional labels) by value."""
+    if not _enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] += value
+
+
+def observe(name, value):
+    """Records value in histogram name."""
+    if not _enabled:
+        return
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                hist["buckets"][i] += 1
+                break
+        hist["sum"] += value
+        hist["count"] += 1
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class _StageTimer:
+    def __init__(self, stage):
+        self.stage = stage
+        self.profiler = None
+
+    def __enter__(self):
+        if _profile_stages and ("all" in _profile_stages or self.stage in _profile_stages) \
+                and random.random() < _profile_rate:
+            self._start_profile()
+        self.start = time.perf_counter()
+        return self
+
+    def _start_profile(self):
+        # One cProfile per process: a second one would replace the first one's
+        # hook (3.11) or raise (3.12+), so skip the sample instead.
+        global _profiling
+        with _profile_lock:
+            if _profiling:
+                return
+            _profiling = True
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool outside this module is active
+            with _profile_lock:
+                _profiling = False
+            return
+        self.profiler = profiler
+
+    def _stop_profile(self):
+        global _profiling
+        try:
+            self.profiler.disable()
+            profile_dir = os.path.join(LOG_DIR, "profiles")
+            os.makedirs(profile_dir, exist_ok=True)
+            self.profiler.dump_stats(os.path.join(profile_dir, f"{self.stage}-{time.time_ns()}.prof"))
+        finally:
+            self.profiler = None
+            with _profile_lock:
+                _profiling = False
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        if self.profiler is not None:
+            self._stop_profile()
+        observe(f"{self.stage}_seconds", elapsed)
+        if exc_type is not None:
+            incr(f"{self.stage}_errors_total")
+        return False
+
+
+def timer(stage):
+    """Returns a context manager timing stage; a shared no-op when disabled."""
+    if not _enabled:
+        return _NOOP_TIMER
+    return _StageTimer(stage)
+
+
+def timed(stage):
+    """Decorator timing every call of the wrapped function as stage."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _StageTimer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """Returns the collected metrics as a list of plain dicts."""
+    with _lock:
+        records = [
+            {"type": "counter", "name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+        for name, hist in sorted(_histograms.items()):
+            records.append({
+                "type": "histogram", "name": name,
+                "buckets": {str(b): c for b, c in zip(BUCKETS, hist["buckets"])},
+                "sum": hist["sum"], "count": hist["count"],
+            })
+    return records
+
+
+def to_prometheus():
+    """Renders the collected metrics in the Prometheus text exposition format."""
+    lines = []
+    typed = set()
+    for rec in snapshot():
+        name = rec["name"]
+        if name not in typed:
+            # Labelled counters share one TYPE line per metric name
+            typed.add(name)
+            lines.append(f"# TYPE {name} {rec['type']}")
+        if rec["type"] == "counter":
+            labels = ",".join(f'{k}="{v}"' for k, v in rec["labels"].items())
+            lines.append(f"{name}{{{labels}}} {rec['value']}" if labels else f"{name} {rec['value']}")
+            continue
+        cumulative = 0
+        for bound, count in rec["buckets"].items():
+            cumulative += count
+            le = "+Inf" if bound == "inf" else bound
+            lines.append(f'{name}_bucket{{le="{le}"}} {cumulative}')
+        lines.append(f"{name}_sum {rec['sum']}")
+        lines.append(f"{name}_count {rec['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path=None, fmt="jsonl"):
+    """
+    Writes the collected metrics to path ('jsonl' appends one run, 'prometheus'
+    overwrites). Defaults to LOG_DIR/metrics.jsonl or LOG_DIR/metrics.prom.
+    """
+    if fmt not in ("jsonl", "prometheus"):
+        raise ValueError(f"Unknown metrics format '{fmt}'")
+    if path is None:
+        path = os.path.join(LOG_DIR, "metrics.jsonl" if fmt == "jsonl" else "metrics.prom")
+    if fmt == "prometheus":
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(to_prometheus())
+    else:
+        ts = time.time()
+        with open(path, "a", encoding="utf-8") as f:
+            for rec in snapshot():
+                f.write(json.dumps(dict(rec, ts=ts)) + "\n")
+    return path
@@ -16,9 +16,11 @@ import pandas as pd
 from bs4 import BeautifulSoup as bs
 import logging
 from progiter.manager import ProgressManager  # added import
+from sec_edgar import metrics
 
 logger = logging.getLogger(__name__)
 
+@metrics.timed("parse")
 def parse_10k_filing(file_path, section):
     """
     Parse the 10-K filing at file_path and extract requested sections.
@@ -4,16 +4,33 @@ import pandas as pd
 import logging
 from sec_edgar.config import DATA_DIR
 from sec_edgar.parser_lib import parse_10k_filing
+from sec_edgar.dedup import find_exact_duplicates, dedup_stats
+from sec_edgar import metrics
 from progiter.manager import ProgressManager  # added import
 
 logger = logging.getLogger(__name__)
 
-def parse_and_save_filings(df_history):
+def _newest_first(filing_files, df_history):
     """
-    Locate filing files in DATA_DIR, parse each using parse_10k_filing, and save a consolidated CSV.
-    The output DataFrame includes columns: Text, ticker, accessionNumber, cik, and filepath.
+    Orders filing files by the history's filingDate, newest first, then by path,
+    so the canonical copy of a repeated section is the company's latest filing.
     """
-    filing_files = glob.glob(os.path.join(DATA_DIR, "*", "*.htm"))
+    filing_files = sorted(filing_files)
+    if 'filingDate' not in df_history.columns:
+        return filing_files
+    dates = dict(zip(df_history['primaryDocument'], df_history['filingDate'].astype(str)))
+    return sorted(filing_files, key=lambda path: dates.get(os.path.basename(path), ""), reverse=True)
+
+def parse_and_save_filings(df_history, data_dir=DATA_DIR):
+    """
+    Locate filing files in data_dir, parse each using parse_10k_filing, and save a consolidated CSV.
+    The output DataFrame includes columns: Text, ticker, accessionNumber, cik, filepath and
+    duplicate_of, the row position of an earlier identical section of the same company
+    (empty if unique). Filings are processed newest first, so the kept copy is the latest
+    filing. Near-duplicates are left to chunk-level dedup so new text in a
+    mostly repeated section is still indexed.
+    """
+    filing_files = _newest_first(glob.glob(os.path.join(data_dir, "*", "*.htm")), df_history)
     if not filing_files:
         logger.error("No downloaded filing files found.")
         return
@@ -23,6 +40,8 @@ def parse_and_save_filings(df_history):
         for file_path in pman.progiter(filing_files, desc="Parsing filings"):
             try:
                 sections = parse_10k_filing(file_path, 0)  # returns list of sections
+                metrics.incr("filings_parsed_total")
+                metrics.incr("sections_parsed_total", len(sections))
                 # Extract ticker from the file's parent directory name.
                 ticker = os.path.basename(os.path.dirname(file_path))
                 primary_doc = os.path.basename(file_path)
@@ -37,8 +56,17 @@ def parse_and_save_filings(df_history):
                     }
                     processed_data.append(row_data)
             except Exception as ex:
+                metrics.incr("filings_failed_total")
                 logger.error("Error processing %s: %s", file_path, ex)
     processed_df = pd.DataFrame(processed_data)
-    output_csv = os.path.join(DATA_DIR, "processed_filings.csv")
+    if not processed_df.empty:
+        texts = processed_df["Text"].tolist()
+        duplicate_of = find_exact_duplicates(texts, processed_df["cik"].tolist())
+        processed_df["duplicate_of"] = pd.array(duplicate_of, dtype="Int64")
+        stats = dedup_stats(texts, duplicate_of)
+        metrics.incr("duplicate_sections_total", stats["duplicates"])
+        logger.info("Duplicate sections: %d of %d (%.1f%% of text not re-embedded)",
+                    stats["duplicates"], stats["total"], stats["saved_pct"])
+    output_csv = os.path.join(data_dir, "processed_filings.csv")
     processed_df.to_csv(output_csv, index=False)
     logger.info("Processed filings saved to %s", output_csv)
@@ -0,0 +1,274 @@
+import glob
+import hashlib
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import logging
+import pandas as pd
+from sec_edgar.config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# Root directory holding the shared work queue plus one sub-directory per run
+SHARDS_DIR = os.path.join(DATA_DIR, 'shards')
+
+# Per-shard CSV outputs that the merge step concatenates back into DATA_DIR
+MERGED_OUTPUTS = ['filing_history.csv', 'processed_filings.csv']
+
+# A claimed CIK whose lease is not renewed for this long can be stolen
+LEASE_SECONDS = 900
+# A CIK that failed this many times is left as 'failed' for the run
+MAX_ATTEMPTS = 3
+
+
+def parse_shard(spec):
+    """
+    Parses a shard spec of the form 'i/N' into (index, num_shards).
+    Index is zero based, so valid specs for N=4 are 0/4 .. 3/4.
+    """
+    try:
+        index, num_shards = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard spec '{spec}', expected 'i/N'")
+    if num_shards < 1 or not 0 <= index < num_shards:
+        raise ValueError(f"Invalid shard spec '{spec}', index must be in [0, {num_shards})")
+    return index, num_shards
+
+
+def shard_of(cik, num_shards):
+    """
+    Returns the shard owning a CIK. Uses md5 rather than hash() so the
+    assignment is stable across processes and machines.
+    """
+    digest = hashlib.md5(str(int(cik)).zfill(10).encode('ascii')).hexdigest()
+    return int(digest, 16) % num_shards
+
+
+def shard_dir(run_id, index, num_shards):
+    """Returns (and creates) the output directory of a shard within a run."""
+    path = os.path.join(SHARDS_DIR, run_id, f"shard-{index}-of-{num_shards}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def history_path(out_dir, cik, worker_id):
+    """
+    Returns the path of the history file a worker writes for a completed CIK,
+    out_dir/history/<cik>.<worker>.csv (':' in the worker id becomes '-').
+    """
+    return os.path.join(out_dir, 'history', f"{int(cik)}.{worker_id.replace(':', '-')}.csv")
+
+
+class WorkQueue:
+    """
+    CIK work queue shared by all shards of one run through a SQLite file.
+
+    Rows are scoped by run_id, so every refresh starts with all CIKs pending.
+    Every worker of a run enqueues the full ticker universe (inserts are
+    idempotent), then claims CIKs of its own shard first and steals pending
+    CIKs owned by other shards once its own are exhausted. A claim is a lease
+    kept alive by start_heartbeat(); if the worker dies, the lease expires and
+    another worker takes the CIK over. Failed CIKs go back to pending until
+    they have been tried MAX_ATTEMPTS times. The database must live on a
+    filesystem that supports SQLite locking when shared across machines.
+    """
+
+    def __init__(self, num_shards, run_id, db_path=None, worker_id=None,
+                 lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.num_shards = num_shards
+        self.run_id = run_id
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.db_path = db_path or os.path.join(SHARDS_DIR, f"work_queue-{num_shards}.db")
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = self._connect()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS work_items ("
+            " run_id TEXT NOT NULL,"
+            " cik INTEGER NOT NULL,"
+            " shard INTEGER NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending',"
+            " worker TEXT,"
+            " lease_until REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (run_id, cik))"
+        )
+        self._stop_heartbeat = threading.Event()
+        self._heartbeat = None
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+
+    def populate(self, df_tickers):
+        """Enqueues every CIK in df_tickers with its owning shard."""
+        ciks = {int(cik) for cik in df_tickers['cik']}
+        rows = [(self.run_id, cik, shard_of(cik, self.num_shards)) for cik in ciks]
+        self.conn.executemany("INSERT OR IGNORE INTO work_items (run_id, cik, shard) VALUES (?, ?, ?)", rows)
+
+    def claim(self, index):
+        """
+        Atomically claims the next pending (or abandoned) CIK, preferring the
+        worker's own shard. Returns None once no claimable work remains.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT cik FROM work_items WHERE run_id = ? "
+                "AND (status = 'pending' OR (status = 'claimed' AND lease_until < ?)) "
+                "ORDER BY shard != ?, cik LIMIT 1",
+                (self.run_id, now, index)
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE work_items SET status = 'claimed', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE run_id = ? AND cik = ?",
+                (self.worker_id, now + self.lease_seconds, self.run_id, row[0])
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return row[0]
+
+    def complete(self, cik, failed=False):
+        """
+        Marks a CIK claimed by this worker as done, or as failed (pending again
+        while attempts remain). Returns False if the lease was lost to another
+        worker, in which case this worker's results for the CIK must be dropped.
+        """
+        if failed:
+            cur = self.conn.execute(
+                "UPDATE work_items SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker = NULL, lease_until = NULL "
+                "WHERE run_id = ? AND cik = ? AND worker = ? AND status = 'claimed'",
+                (self.max_attempts, self.run_id, int(cik), self.worker_id)
+            )
+        else:
+            cur = self.conn.execute(
+                "UPDATE work_items SET status = 'done', lease_until = NULL "
+                "WHERE run_id = ? AND cik = ? AND worker = ? AND status = 'claimed'",
+                (self.run_id, int(cik), self.worker_id)
+            )
+        return cur.rowcount == 1
+
+    def renew(self, conn=None):
+        """Extends the leases of every CIK this worker currently holds."""
+        (conn or self.conn).execute(
+            "UPDATE work_items SET lease_until = ? WHERE run_id = ? AND worker = ? AND status = 'claimed'",
+            (time.time() + self.lease_seconds, self.run_id, self.worker_id)
+        )
+
+    def start_heartbeat(self):
+        """Renews this worker's leases from a background thread until close()."""
+        def beat():
+            conn = self._connect()
+            try:
+                while not self._stop_heartbeat.wait(self.lease_seconds / 3):
+                    self.renew(conn)
+            finally:
+                conn.close()
+        self._heartbeat = threading.Thread(target=beat, daemon=True)
+        self._heartbeat.start()
+
+    def iter_claims(self, index):
+        """Yields CIKs claimed by this worker until the queue is drained."""
+        while True:
+            cik = self.claim(index)
+            if cik is None:
+                return
+            yield cik
+
+    def done_workers(self):
+        """Returns {cik: worker} for every CIK of the run marked done."""
+        return dict(self.conn.execute(
+            "SELECT cik, worker FROM work_items WHERE run_id = ? AND status = 'done'", (self.run_id,)
+        ).fetchall())
+
+    def counts(self):
+        """Returns {status: number of CIKs} for the run."""
+        return dict(self.conn.execute(
+            "SELECT status, COUNT(*) FROM work_items WHERE run_id = ? GROUP BY status", (self.run_id,)
+        ).fetchall())
+
+    def close(self):
+        self._stop_heartbeat.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+        self.conn.close()
+
+
+def reconcile_history(queue, out_dir, df_tickers):
+    """
+    Returns the history files of a shard that the run's queue records as done
+    by the worker that wrote them, sorted by path.
+
+    Any other history file was left by a worker that crashed between writing it
+    and completing the CIK, or that lost the CIK to another worker, so it is
+    deleted. The CIK's ticker folders go with it unless a valid history file for
+    the CIK remains in the shard.
+    """
+    done = queue.done_workers()
+    valid, stale = [], set()
+    for path in sorted(glob.glob(os.path.join(out_dir, 'history', '*.csv'))):
+        cik = os.path.basename(path).split('.', 1)[0]
+        if cik.isdigit() and int(cik) in done and path == history_path(out_dir, cik, done[int(cik)]):
+            valid.append(path)
+            continue
+        logger.warning("Discarding history %s: not completed by its worker in run %s", path, queue.run_id)
+        os.remove(path)
+        if cik.isdigit():
+            stale.add(int(cik))
+
+    stale -= {int(os.path.basename(path).split('.', 1)[0]) for path in valid}
+    if stale:
+        df_stale = df_tickers[df_tickers['cik'].astype(int).isin(stale)]
+        for ticker in df_stale['ticker']:
+            shutil.rmtree(os.path.join(out_dir, ticker), ignore_errors=True)
+    return valid
+
+
+def merge_shards(num_shards, run_id, output_dir=DATA_DIR):
+    """
+    Concatenates the per-shard history and processed outputs of a run into
+    output_dir. Shards missing an output (e.g. a worker that claimed no CIKs)
+    are skipped.
+    """
+    queue_path = os.path.join(SHARDS_DIR, f"work_queue-{num_shards}.db")
+    if os.path.exists(queue_path):
+        queue = WorkQueue(num_shards, run_id, db_path=queue_path)
+        counts = queue.counts()
+        queue.close()
+        unfinished = {status: n for status, n in counts.items() if status != 'done'}
+        if unfinished:
+            logger.warning("Run %s is not finished: %s", run_id, unfinished)
+            print(f"Warning: run {run_id} has unfinished CIKs: {unfinished}")
+
+    for name in MERGED_OUTPUTS:
+        pattern = os.path.join(SHARDS_DIR, run_id, f"shard-*-of-{num_shards}", name)
+        parts = []
+        offset = 0
+        for path in sorted(glob.glob(pattern)):
+            try:
+                df_part = pd.read_csv(path)
+            except pd.errors.EmptyDataError:
+                logger.warning("Skipping empty shard output %s", path)
+                continue
+            # duplicate_of pointers are row positions local to the shard
+            if 'duplicate_of' in df_part.columns:
+                df_part['duplicate_of'] = df_part['duplicate_of'].astype('Int64') + offset
+            offset += len(df_part)
+            parts.append(df_part)
+        if not parts:
+            logger.warning("No shard outputs found for %s", name)
+            continue
+        df_merged = pd.concat(parts, ignore_index=True)
+        merged_path = os.path.join(output_dir, name)
+        df_merged.to_csv(merged_path, index=False)
+        print(f"Merged {len(parts)} shard(s) into {merged_path}")
@@ -3,6 +3,7 @@ import pandas as pd
 from progiter import ProgIter
 import requests
 from sec_edgar.config import BASE_URL, HEADERS, DATA_DIR
+from sec_edgar import metrics
 
 def get_company_tickers():
     """
@@ -17,7 +18,10 @@ def get_company_tickers():
     return df
 
 def get_current_filing_history(url, header):
-    response = requests.get(url, headers=header)
+    with metrics.timer("history_fetch"):
+        response = requests.get(url, headers=header)
+    metrics.incr("http_requests_total", status=response.status_code)
+    metrics.incr("bytes_downloaded_total", len(response.content))
     response.raise_for_status()
     company_filings = response.json()
     company_filings_df = pd.DataFrame(company_filings["filings"]["recent"])
@@ -37,8 +41,8 @@ def pull_all_history(df, header):
         df_all = pd.concat([company_filings_df, df_all], ignore_index=True)
     return df_all
 
-def save_history_to_csv(df_history):
-    """Saves the filing history DataFrame to CSV."""
-    csv_path = os.path.join(DATA_DIR, 'filing_history.csv')
+def save_history_to_csv(df_history, data_dir=DATA_DIR):
+    """Saves the filing history DataFrame to CSV in data_dir."""
+    csv_path = os.path.join(data_dir, 'filing_history.csv')
     df_history.to_csv(csv_path, index=False)
     print(f"Filing history saved to {csv_path}")
\ No newline at end of file
@@ -0,0 +1,281 @@
+"""
+Persistent Chroma index over processed filings.
+
+The index is built ahead of time with `python src/vector_index.py` and
+persisted under DATA_DIR/chroma_index, so app processes load it from disk
+instead of re-embedding every filing on start. Readers never build: a stale
+index is only reported. Each build goes into its own directory under
+chroma_index/builds and is swapped in by atomically replacing the
+chroma_index/current symlink.
+
+Every process that opens a build holds a reader lease on it (a
+chroma_index/readers/<build>.<host>.<pid> file) until it exits. A rebuild only
+removes superseded builds that no live process holds, so it never deletes an
+index a running app or query service still reads. Leases of processes on this
+host that died without releasing them are ignored; leases from other hosts are
+always honoured, so delete them by hand if such a reader crashed.
+
+The embedding model is loaded once per process. langchain, chromadb and
+sentence-transformers are imported inside the functions that need them to keep
+imports cheap.
+"""
+
+import atexit
+import functools
+import json
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import time
+from collections import defaultdict
+from sec_edgar.config import DATA_DIR
+from sec_edgar import metrics
+
+PROCESSED_CSV = os.path.join(DATA_DIR, "processed_filings.csv")
+INDEX_DIR = os.path.join(DATA_DIR, "chroma_index")
+STATS_FILE = "index_stats.json"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+READERS_DIR = "readers"
+
+logger = logging.getLogger(__name__)
+
+# Reader lease files created by this process, removed at exit
+_leases = set()
+
+
+@functools.lru_cache(maxsize=None)
+def get_embedder():
+    """Returns the sentence-transformers embedder, loading the model once per process."""
+    from langchain_huggingface.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"normalize_embeddings": True}
+    )
+
+
+def build_vector_store(data_path=PROCESSED_CSV, persist_directory=INDEX_DIR):
+    """
+    Embeds the processed filings into a new build under persist_directory and
+    makes it the current index. Returns (vectorstore, stats).
+    """
+    import pandas as pd
+    from langchain_core.documents import Document
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_community.vectorstores import Chroma
+    from sec_edgar.dedup import find_near_duplicates, dedup_stats
+
+    df = pd.read_csv(data_path)
+    # Accession numbers of filings whose section repeats an earlier one of the same company
+    duplicate_accessions = defaultdict(list)
+    if "duplicate_of" in df.columns:
+        for dup_of, accession in zip(df["duplicate_of"], df["accessionNumber"]):
+            if pd.notna(dup_of):
+                duplicate_accessions[int(dup_of)].append(accession)
+
+    docs = []
+    skipped_sections = 0
+    for pos, row in df.iterrows():
+        # Exact duplicate sections are recorded on their first copy instead of being embedded again
+        if pd.notna(row.get("duplicate_of")):
+            skipped_sections += 1
+            continue
+        content = f"{row['Text']}\nTicker: {row['ticker']}\nCIK: {row['cik']}\nAccession Number: {row['accessionNumber']}"
+        metadata = {
+            "ticker": row["ticker"],
+            "cik": row["cik"],
+            "accessionNumber": row["accessionNumber"],
+            "filepath": row["filepath"],
+            "duplicate_accessions": ",".join(duplicate_accessions.get(pos, [])),
+        }
+        docs.append(Document(page_content=content, metadata=metadata))
+
+    # Split into chunks
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+    split_docs = splitter.split_documents(docs)
+
+    # Drop near-duplicate chunks of the same company; the kept chunk lists the
+    # accession numbers of the filings whose copy was dropped.
+    texts = [doc.page_content for doc in split_docs]
+    duplicate_of = find_near_duplicates(texts, [doc.metadata["cik"] for doc in split_docs])
+    stats = dedup_stats(texts, duplicate_of)
+    stats["sections"] = len(df)
+    stats["skipped_sections"] = skipped_sections
+    for doc, dup in zip(split_docs, duplicate_of):
+        if dup is None:
+            continue
+        canonical = split_docs[dup].metadata
+        accessions = [a for a in canonical["duplicate_accessions"].split(",") if a]
+        accessions += [doc.metadata["accessionNumber"]]
+        accessions += [a for a in doc.metadata["duplicate_accessions"].split(",") if a]
+        canonical["duplicate_accessions"] = ",".join(
+            dict.fromkeys(a for a in accessions if a != canonical["accessionNumber"])
+        )
+    split_docs = [doc for doc, dup in zip(split_docs, duplicate_of) if dup is None]
+    # The stuff-documents prompt only shows page_content, so list the other
+    # filings there for the LLM to cite
+    for doc in split_docs:
+        if doc.metadata["duplicate_accessions"]:
+            doc.page_content += f"\nAlso in Accession Numbers: {doc.metadata['duplicate_accessions'].replace(',', ', ')}"
+
+    builds_root = os.path.join(persist_directory, "builds")
+    os.makedirs(builds_root, exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix=f"{time.strftime('%Y%m%dT%H%M%S')}-", dir=builds_root)
+    # Hold the unfinished build so a concurrent rebuild does not prune it
+    _acquire_lease(build_dir)
+    with metrics.timer("embed_index"):
+        vectorstore = Chroma.from_documents(
+            documents=split_docs, embedding=get_embedder(), persist_directory=build_dir
+        )
+    metrics.incr("chunks_total", len(split_docs))
+    with open(os.path.join(build_dir, STATS_FILE), "w", encoding="utf-8") as f:
+        json.dump(stats, f)
+    _swap_current(persist_directory, build_dir)
+    _prune_builds(persist_directory)
+    return vectorstore, stats
+
+
+def _swap_current(persist_directory, build_dir):
+    """Points persist_directory/current at build_dir with an atomic rename."""
+    link = os.path.join(persist_directory, "current")
+    tmp_link = f"{link}.tmp-{os.getpid()}"
+    os.symlink(os.path.relpath(build_dir, persist_directory), tmp_link)
+    os.replace(tmp_link, link)
+
+
+def _lease_path(build_dir):
+    """Returns this process's reader lease file for build_dir."""
+    persist_directory = os.path.dirname(os.path.dirname(build_dir))
+    name = f"{os.path.basename(build_dir)}.{socket.gethostname()}.{os.getpid()}"
+    return os.path.join(persist_directory, READERS_DIR, name)
+
+
+def _acquire_lease(build_dir):
+    lease = _lease_path(build_dir)
+    os.makedirs(os.path.dirname(lease), exist_ok=True)
+    open(lease, "w").close()
+    if not _leases:
+        atexit.register(release_builds)
+    _leases.add(lease)
+    return lease
+
+
+def release_builds():
+    """Drops every reader lease held by this process."""
+    while _leases:
+        lease = _leases.pop()
+        if os.path.exists(lease):
+            os.remove(lease)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _held_builds(persist_directory):
+    """Returns the names of builds with a reader lease held by a live process."""
+    readers_dir = os.path.join(persist_directory, READERS_DIR)
+    if not os.path.isdir(readers_dir):
+        return set()
+    hostname = socket.gethostname()
+    held = set()
+    for name in os.listdir(readers_dir):
+        build, _, owner = name.partition(".")
+        host, _, pid = owner.rpartition(".")
+        if host == hostname and pid.isdigit() and not _pid_alive(int(pid)):
+            # The reader exited without releasing its lease
+            os.remove(os.path.join(readers_dir, name))
+            continue
+        held.add(build)
+    return held
+
+
+def _prune_builds(persist_directory):
+    """Removes every build that is neither current nor held by a live reader."""
+    builds_root = os.path.join(persist_directory, "builds")
+    current = current_build(persist_directory)
+    held = _held_builds(persist_directory)
+    for name in os.listdir(builds_root):
+        path = os.path.join(builds_root, name)
+        if name in held or os.path.realpath(path) == current:
+            continue
+        logger.info("Removing superseded index build %s", path)
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def hold_build(build_dir=None, persist_directory=INDEX_DIR):
+    """
+    Takes a reader lease on build_dir (default: the current build) so that
+    rebuilds keep it on disk until this process exits. Returns the held build
+    directory, or None if nothing was built.
+    """
+    while True:
+        resolved = build_dir or current_build(persist_directory)
+        if resolved is None:
+            return None
+        lease = _acquire_lease(resolved)
+        if os.path.exists(os.path.join(resolved, STATS_FILE)):
+            return resolved
+        # Pruned between resolving and leasing it
+        _leases.discard(lease)
+        os.remove(lease)
+        if build_dir is not None:
+            raise FileNotFoundError(f"Index build {build_dir} no longer exists")
+
+
+def current_build(persist_directory=INDEX_DIR):
+    """Returns the resolved directory of the current build, or None if nothing was built."""
+    link = os.path.join(persist_directory, "current")
+    if not os.path.exists(os.path.join(link, STATS_FILE)):
+        return None
+    return os.path.realpath(link)
+
+
+def index_is_stale(data_path=PROCESSED_CSV, persist_directory=INDEX_DIR):
+    """
+    True if the current index is missing or older than the processed filings CSV.
+    A prebuilt index shipped without the CSV is not stale.
+    """
+    build_dir = current_build(persist_directory)
+    if build_dir is None:
+        return True
+    if not os.path.exists(data_path):
+        return False
+    return os.path.getmtime(os.path.join(build_dir, STATS_FILE)) < os.path.getmtime(data_path)
+
+
+def load_vector_store(data_path=PROCESSED_CSV, persist_directory=INDEX_DIR, build_dir=None):
+    """
+    Opens a built index read-only: build_dir if given, else the current build,
+    and holds it until the process exits. Never builds; a stale index is logged
+    and served as is.
+    Returns (vectorstore, stats).
+    """
+    build_dir = hold_build(build_dir, persist_directory)
+    if build_dir is None:
+        raise FileNotFoundError(
+            f"No filings index at {persist_directory}; build it with `python src/vector_index.py`"
+        )
+    if os.path.exists(data_path) and os.path.getmtime(os.path.join(build_dir, STATS_FILE)) < os.path.getmtime(data_path):
+        logger.warning("Filings index %s is older than %s; rebuild it with `python src/vector_index.py`",
+                       build_dir, data_path)
+
+    from langchain_community.vectorstores import Chroma
+    with open(os.path.join(build_dir, STATS_FILE), encoding="utf-8") as f:
+        stats = json.load(f)
+    with metrics.timer("load_index"):
+        vectorstore = Chroma(persist_directory=build_dir, embedding_function=get_embedder())
+    return vectorstore, stats
+
+
+if __name__ == "__main__":
+    _, index_stats = build_vector_store()
+    print(f"Index built at {current_build()}: {index_stats['total'] - index_stats['duplicates']} chunks embedded")
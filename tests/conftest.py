@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules under src/ are imported the way src/main.py sees them
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
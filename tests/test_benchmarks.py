@@ -0,0 +1,13 @@
+from benchmarks.synthetic import make_filing
+from sec_edgar.parser_lib import parse_10k_filing
+
+
+def test_parser_extracts_sections_of_synthetic_filing(tmp_path):
+    path = tmp_path / 'syn0-10k.htm'
+    path.write_text(make_filing(0, paragraphs=20), encoding='utf-8')
+    business, risk, mda = parse_10k_filing(str(path), 0)
+    assert business.startswith('Item 1. Business')
+    assert risk.startswith('Item 1A. Risk Factors')
+    assert mda.startswith("Item 7. Management's Discussion and Analysis")
+    # Each section carries its share of the paragraphs, not just a heading
+    assert all(len(text) > 1000 for text in (business, risk, mda))
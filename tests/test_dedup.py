@@ -0,0 +1,43 @@
+import random
+from sec_edgar.dedup import find_near_duplicates, find_exact_duplicates, dedup_stats
+
+
+def random_text(seed, words=400):
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(3000)]
+    return " ".join(rng.choice(vocab) for _ in range(words))
+
+
+def test_near_duplicate_points_at_first_copy():
+    base = random_text(0)
+    edited = base.replace(base.split()[10], "changed", 1)
+    texts = [base, random_text(1), edited, base]
+    assert find_near_duplicates(texts) == [None, None, 0, 0]
+
+
+def test_dissimilar_texts_are_kept():
+    base = random_text(0)
+    half_new = " ".join(base.split()[:200]) + " " + random_text(2, 200)
+    assert find_near_duplicates([base, half_new]) == [None, None]
+
+
+def test_groups_are_not_collapsed():
+    boilerplate = "Item 1B. Unresolved Staff Comments. None."
+    texts = [boilerplate, boilerplate, boilerplate]
+    assert find_near_duplicates(texts) == [None, 0, 0]
+    assert find_near_duplicates(texts, groups=[320193, 789019, 320193]) == [None, None, 0]
+
+
+def test_empty_and_missing_texts_are_skipped():
+    assert find_near_duplicates(["", None, "   "]) == [None, None, None]
+
+
+def test_exact_duplicates_ignore_whitespace_only():
+    texts = ["Risk factors  apply.", "Risk factors\napply.", "Risk factors apply!", "Risk factors apply."]
+    assert find_exact_duplicates(texts, groups=[1, 1, 1, 2]) == [None, 0, None, None]
+
+
+def test_dedup_stats():
+    stats = dedup_stats(["aaaa", "aaaa", "bb"], [None, 0, None])
+    assert stats["duplicates"] == 1
+    assert stats["saved_pct"] == 40.0
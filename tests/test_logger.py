@@ -0,0 +1,83 @@
+import csv
+import queue
+import threading
+import time
+import pytest
+from sec_edgar.logger import start_log_worker, log_worker, make_log_queue
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_bad_entries_do_not_stop_the_worker(tmp_path):
+    path = str(tmp_path / 'history.csv')
+    log_queue, thread = start_log_worker(path, batch_size=2, flush_interval=0.05)
+    log_queue.put({'url': 'a', 'status': 200})
+    log_queue.put('not a dict')
+    log_queue.put({'url': 'b', 'status': 200, 'extra': 1})
+    log_queue.put(None)
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert log_queue.unfinished_tasks == 0
+    assert read_rows(path) == [{'url': 'a', 'status': '200'}, {'url': 'b', 'status': '200'}]
+
+
+def test_unwritable_file_keeps_draining(tmp_path):
+    log_queue, thread = start_log_worker(str(tmp_path / 'missing' / 'history.csv'))
+    for i in range(5):
+        log_queue.put({'url': str(i)})
+    log_queue.put(None)
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert log_queue.unfinished_tasks == 0
+
+
+def test_partial_batch_is_flushed_after_interval(tmp_path):
+    path = str(tmp_path / 'history.csv')
+    log_queue, thread = start_log_worker(path, batch_size=100, flush_interval=0.1)
+    log_queue.put({'url': 'a', 'status': 200})
+    deadline = time.monotonic() + 5
+    while not (tmp_path / 'history.csv').exists() or not read_rows(path):
+        assert time.monotonic() < deadline, "partial batch was not flushed"
+        time.sleep(0.02)
+    assert thread.is_alive()
+    assert read_rows(path) == [{'url': 'a', 'status': '200'}]
+    log_queue.put(None)
+    thread.join(timeout=5)
+
+
+def test_header_is_written_once_across_batches(tmp_path):
+    path = str(tmp_path / 'history.csv')
+    log_queue, thread = start_log_worker(path, batch_size=2, flush_interval=0.05)
+    for i in range(5):
+        log_queue.put({'url': str(i), 'status': 200})
+    log_queue.put(None)
+    thread.join(timeout=5)
+    # A second worker appends to the existing file without a new header
+    log_queue, thread = start_log_worker(path, batch_size=2)
+    log_queue.put({'url': '5', 'status': 200})
+    log_queue.put(None)
+    thread.join(timeout=5)
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert lines.count('url,status') == 1
+    assert [row['url'] for row in read_rows(path)] == [str(i) for i in range(6)]
+
+
+def test_put_blocks_when_queue_is_full(tmp_path):
+    log_queue = make_log_queue(maxsize=2)
+    log_queue.put({'url': '0'})
+    log_queue.put({'url': '1'})
+    with pytest.raises(queue.Full):
+        log_queue.put({'url': '2'}, timeout=0.05)
+
+    # Once the worker drains the queue, producers continue
+    thread = threading.Thread(target=log_worker, args=(log_queue, str(tmp_path / 'history.csv')),
+                              kwargs={'batch_size': 2, 'flush_interval': 0.05}, daemon=True)
+    thread.start()
+    log_queue.put({'url': '2'}, timeout=5)
+    log_queue.put(None, timeout=5)
+    thread.join(timeout=5)
+    assert [row['url'] for row in read_rows(str(tmp_path / 'history.csv'))] == ['0', '1', '2']
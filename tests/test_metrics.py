@@ -0,0 +1,69 @@
+import os
+import threading
+import pytest
+from sec_edgar import metrics
+
+
+@pytest.fixture
+def profiling(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'LOG_DIR', str(tmp_path))
+    monkeypatch.setattr(metrics, '_profile_stages', {'all'})
+    monkeypatch.setattr(metrics, '_profile_rate', 1.0)
+    monkeypatch.setattr(metrics, '_enabled', True)
+    metrics.reset()
+    yield tmp_path / 'profiles'
+    metrics.reset()
+
+
+def test_nested_timers_profile_only_the_outer_stage(profiling):
+    with metrics.timer('query'):
+        with metrics.timer('retrieval'):
+            sum(range(1000))
+    profiles = os.listdir(profiling)
+    assert len(profiles) == 1 and profiles[0].startswith('query-')
+    # The slot is released, so the next stage is sampled again
+    with metrics.timer('parse'):
+        pass
+    assert len(os.listdir(profiling)) == 2
+
+
+def test_concurrent_timers_do_not_fail(profiling):
+    start = threading.Barrier(4)
+    errors = []
+
+    def run():
+        try:
+            start.wait()
+            for _ in range(20):
+                with metrics.timer('retrieval'):
+                    sum(range(1000))
+        except Exception as ex:
+            errors.append(ex)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert {rec['name']: rec['count'] for rec in metrics.snapshot() if rec['type'] == 'histogram'} == {
+        'retrieval_seconds': 80
+    }
+
+
+def test_disabled_timer_is_shared_noop(monkeypatch):
+    monkeypatch.setattr(metrics, '_enabled', False)
+    assert metrics.timer('a') is metrics.timer('b')
+
+
+def test_prometheus_output_is_typed(monkeypatch):
+    monkeypatch.setattr(metrics, '_enabled', True)
+    metrics.reset()
+    metrics.incr('http_requests_total', status=200)
+    metrics.incr('http_requests_total', status=404)
+    metrics.observe('parse_seconds', 0.02)
+    lines = metrics.to_prometheus().splitlines()
+    metrics.reset()
+    assert lines.count('# TYPE http_requests_total counter') == 1
+    assert lines.index('# TYPE http_requests_total counter') < lines.index('http_requests_total{status="200"} 1.0')
+    assert lines.index('# TYPE parse_seconds histogram') < lines.index('parse_seconds_bucket{le="0.05"} 1')
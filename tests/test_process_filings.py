@@ -0,0 +1,17 @@
+import pandas as pd
+from sec_edgar.process_filings import _newest_first
+
+
+def test_filings_are_ordered_newest_first():
+    files = ['data/AAA/b.htm', 'data/AAA/a.htm', 'data/BBB/c.htm', 'data/BBB/unknown.htm']
+    df_history = pd.DataFrame({
+        'primaryDocument': ['a.htm', 'b.htm', 'c.htm'],
+        'filingDate': ['2022-10-28', '2024-11-01', '2024-11-01'],
+    })
+    assert _newest_first(files, df_history) == ['data/AAA/b.htm', 'data/BBB/c.htm', 'data/AAA/a.htm',
+                                                'data/BBB/unknown.htm']
+
+
+def test_order_is_by_path_without_filing_dates():
+    files = ['data/BBB/c.htm', 'data/AAA/b.htm']
+    assert _newest_first(files, pd.DataFrame({'primaryDocument': ['b.htm']})) == ['data/AAA/b.htm', 'data/BBB/c.htm']
@@ -0,0 +1,62 @@
+import asyncio
+import json
+from aiohttp.test_utils import TestClient, TestServer
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+from query_service import create_app
+from rag_chain import create_rag_chain, stub_llm, STUB_ANSWER
+
+
+def make_chain():
+    vectorstore = InMemoryVectorStore(DeterministicFakeEmbedding(size=16))
+    vectorstore.add_documents([
+        Document(page_content=f"Risk factors of filing {i}", metadata={"ticker": "AAPL", "accessionNumber": f"0000-{i}"})
+        for i in range(3)
+    ])
+    return create_rag_chain(vectorstore, llm=stub_llm(sleep=0.001), k=2)
+
+
+def run_with_client(test, **app_kwargs):
+    async def run():
+        async with TestClient(TestServer(create_app(make_chain(), **app_kwargs))) as client:
+            return await test(client)
+    return asyncio.run(run())
+
+
+async def query(client, body):
+    response = await client.post("/query", data=body)
+    assert response.status == 200
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    return [json.loads(line) for line in (await response.text()).splitlines()]
+
+
+def test_query_streams_sources_tokens_then_done():
+    events = run_with_client(lambda client: query(client, json.dumps({"query": "risks?"})))
+    types = [event["type"] for event in events]
+    assert types[0] == "sources" and types[-1] == "done"
+    assert set(types[1:-1]) == {"token"}
+    assert len(events[0]["sources"]) == 2
+    assert "".join(event["text"] for event in events[1:-1]) == STUB_ANSWER
+    done = events[-1]
+    assert 0 < done["ttft_ms"] <= done["total_ms"]
+
+
+def test_bad_requests_are_rejected():
+    async def test(client):
+        statuses = []
+        for body in ["not json", json.dumps(["a list"]), json.dumps({"query": "  "}), json.dumps({})]:
+            response = await client.post("/query", data=body)
+            statuses.append(response.status)
+        return statuses
+    assert run_with_client(test) == [400, 400, 400, 400]
+
+
+def test_concurrent_queries_all_stream():
+    async def test(client):
+        return await asyncio.gather(*[query(client, json.dumps({"query": f"q{i}"})) for i in range(20)])
+    results = run_with_client(test, max_concurrency=4)
+    assert len(results) == 20
+    for events in results:
+        assert [events[0]["type"], events[-1]["type"]] == ["sources", "done"]
+        assert "".join(event["text"] for event in events if event["type"] == "token") == STUB_ANSWER
@@ -0,0 +1,163 @@
+import os
+import pandas as pd
+import pytest
+from sec_edgar import sharding
+from sec_edgar.sharding import WorkQueue, parse_shard, shard_of, merge_shards, history_path, reconcile_history
+
+
+@pytest.fixture
+def shards_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(sharding, 'SHARDS_DIR', str(tmp_path / 'shards'))
+    return tmp_path / 'shards'
+
+
+def ciks_by_shard(num_shards, count=40):
+    by_shard = {}
+    for cik in range(1000, 1000 + count):
+        by_shard.setdefault(shard_of(cik, num_shards), []).append(cik)
+    return by_shard
+
+
+def make_queue(tmp_path, run_id='run-1', worker_id='w1', **kwargs):
+    return WorkQueue(2, run_id, db_path=str(tmp_path / 'queue.db'), worker_id=worker_id, **kwargs)
+
+
+def test_parse_shard():
+    assert parse_shard('0/4') == (0, 4)
+    assert parse_shard('3/4') == (3, 4)
+    for spec in ['4/4', '-1/4', '0/0', '1', 'a/b']:
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+def test_shard_of_is_stable_and_in_range():
+    assert [shard_of(cik, 4) for cik in (320193, 789019)] == [shard_of(str(cik), 4) for cik in (320193, 789019)]
+    assert all(0 <= shard_of(cik, 4) < 4 for cik in range(100))
+
+
+def test_claims_own_shard_first_then_steals(tmp_path):
+    by_shard = ciks_by_shard(2)
+    queue = make_queue(tmp_path)
+    queue.populate(pd.DataFrame({'cik': by_shard[0] + by_shard[1]}))
+    claimed = []
+    for cik in queue.iter_claims(1):
+        claimed.append(cik)
+        assert queue.complete(cik)
+    assert claimed == sorted(by_shard[1]) + sorted(by_shard[0])
+    assert queue.counts() == {'done': len(claimed)}
+
+
+def test_new_run_starts_pending(tmp_path):
+    df = pd.DataFrame({'cik': [1001, 1002]})
+    first = make_queue(tmp_path, run_id='run-1')
+    first.populate(df)
+    for cik in first.iter_claims(0):
+        first.complete(cik)
+    assert first.claim(0) is None
+
+    second = make_queue(tmp_path, run_id='run-2')
+    second.populate(df)
+    assert sorted(second.iter_claims(0)) == [1001, 1002]
+
+
+def test_expired_lease_is_stolen(tmp_path):
+    crashed = make_queue(tmp_path, worker_id='crashed', lease_seconds=-1)
+    crashed.populate(pd.DataFrame({'cik': [1001]}))
+    assert crashed.claim(0) == 1001
+
+    thief = make_queue(tmp_path, worker_id='thief')
+    assert thief.claim(1) == 1001
+    assert not crashed.complete(1001)
+    assert thief.complete(1001)
+
+
+def test_live_lease_is_not_stolen(tmp_path):
+    owner = make_queue(tmp_path, worker_id='owner')
+    owner.populate(pd.DataFrame({'cik': [1001]}))
+    assert owner.claim(0) == 1001
+    assert make_queue(tmp_path, worker_id='other').claim(0) is None
+
+
+def test_failed_cik_is_retried_until_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.populate(pd.DataFrame({'cik': [1001]}))
+    assert queue.claim(0) == 1001
+    queue.complete(1001, failed=True)
+    assert queue.counts() == {'pending': 1}
+    assert queue.claim(0) == 1001
+    queue.complete(1001, failed=True)
+    assert queue.counts() == {'failed': 1}
+    assert queue.claim(0) is None
+
+
+def write_cik_output(out_dir, cik, worker_id, ticker):
+    os.makedirs(os.path.join(out_dir, ticker), exist_ok=True)
+    os.makedirs(os.path.join(out_dir, 'history'), exist_ok=True)
+    path = history_path(out_dir, cik, worker_id)
+    pd.DataFrame({'cik': [cik], 'form': ['10-K']}).to_csv(path, index=False)
+    return path
+
+
+def test_reconcile_drops_history_of_crashed_worker(shards_dir, tmp_path):
+    df_tickers = pd.DataFrame({'cik': [1001, 1002], 'ticker': ['AAA', 'BBB']})
+    shard_0 = sharding.shard_dir('run-1', 0, 2)
+    shard_1 = sharding.shard_dir('run-1', 1, 2)
+
+    # Crashes after writing the history of 1001 but before completing it
+    crashed = make_queue(tmp_path, worker_id='host:1', lease_seconds=-1)
+    crashed.populate(df_tickers)
+    assert crashed.claim(0) == 1001
+    write_cik_output(shard_0, 1001, 'host:1', 'AAA')
+
+    # Another shard steals the expired lease and completes it
+    thief = make_queue(tmp_path, worker_id='other.host:7')
+    assert thief.claim(1) == 1001
+    thief_path = write_cik_output(shard_1, 1001, 'other.host:7', 'AAA')
+    assert thief.complete(1001)
+
+    # The restarted shard-0 worker has a new pid and completes 1002
+    restarted = make_queue(tmp_path, worker_id='host:2')
+    assert restarted.claim(0) == 1002
+    restarted_path = write_cik_output(shard_0, 1002, 'host:2', 'BBB')
+    assert restarted.complete(1002)
+
+    assert reconcile_history(restarted, shard_0, df_tickers) == [restarted_path]
+    assert sorted(os.listdir(shard_0)) == ['BBB', 'history']
+    assert reconcile_history(thief, shard_1, df_tickers) == [thief_path]
+    assert os.path.isdir(os.path.join(shard_1, 'AAA'))
+
+
+def test_reconcile_keeps_one_history_per_cik_on_restart(shards_dir, tmp_path):
+    df_tickers = pd.DataFrame({'cik': [1001], 'ticker': ['AAA']})
+    out_dir = sharding.shard_dir('run-1', 0, 2)
+    crashed = make_queue(tmp_path, worker_id='host:1', lease_seconds=-1)
+    crashed.populate(df_tickers)
+    assert crashed.claim(0) == 1001
+    write_cik_output(out_dir, 1001, 'host:1', 'AAA')
+
+    restarted = make_queue(tmp_path, worker_id='host:2')
+    assert restarted.claim(0) == 1001
+    path = write_cik_output(out_dir, 1001, 'host:2', 'AAA')
+    assert restarted.complete(1001)
+
+    assert reconcile_history(restarted, out_dir, df_tickers) == [path]
+    assert os.listdir(os.path.join(out_dir, 'history')) == [os.path.basename(path)]
+    assert os.path.isdir(os.path.join(out_dir, 'AAA'))
+
+
+def test_merge_offsets_duplicate_pointers(shards_dir, tmp_path):
+    for index, frame in enumerate([
+        pd.DataFrame({'Text': ['a', 'a2'], 'duplicate_of': pd.array([None, 0], dtype='Int64')}),
+        pd.DataFrame({'Text': ['b', 'b2', 'b3'], 'duplicate_of': pd.array([None, None, 1], dtype='Int64')}),
+    ]):
+        frame.to_csv(os.path.join(sharding.shard_dir('run-1', index, 2), 'processed_filings.csv'), index=False)
+    # Outputs of another run must not be merged
+    pd.DataFrame({'Text': ['old'], 'duplicate_of': [None]}).to_csv(
+        os.path.join(sharding.shard_dir('run-0', 0, 2), 'processed_filings.csv'), index=False)
+
+    out_dir = tmp_path / 'out'
+    out_dir.mkdir()
+    merge_shards(2, 'run-1', output_dir=str(out_dir))
+    merged = pd.read_csv(out_dir / 'processed_filings.csv')
+    assert merged['Text'].tolist() == ['a', 'a2', 'b', 'b2', 'b3']
+    assert merged['duplicate_of'].astype('Int64').tolist() == [pd.NA, 0, pd.NA, pd.NA, 3]
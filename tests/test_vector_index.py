@@ -0,0 +1,72 @@
+import os
+import socket
+import subprocess
+import sys
+import pytest
+import vector_index
+from vector_index import STATS_FILE, current_build, hold_build, release_builds, _swap_current, _prune_builds
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    yield str(tmp_path)
+    release_builds()
+
+
+def make_build(index_dir, name):
+    path = os.path.join(index_dir, 'builds', name)
+    os.makedirs(path)
+    open(os.path.join(path, STATS_FILE), 'w').close()
+    return path
+
+
+def rebuild(index_dir, name):
+    path = make_build(index_dir, name)
+    _swap_current(index_dir, path)
+    _prune_builds(index_dir)
+    return path
+
+
+def builds(index_dir):
+    return sorted(os.listdir(os.path.join(index_dir, 'builds')))
+
+
+def test_rebuilds_keep_builds_held_by_readers(index_dir):
+    first = rebuild(index_dir, 'b1')
+    assert hold_build(persist_directory=index_dir) == first
+    rebuild(index_dir, 'b2')
+    third = rebuild(index_dir, 'b3')
+    assert builds(index_dir) == ['b1', 'b3']
+    assert current_build(index_dir) == os.path.realpath(third)
+
+    release_builds()
+    rebuild(index_dir, 'b4')
+    assert builds(index_dir) == ['b4']
+
+
+def test_leases_of_dead_readers_are_ignored(index_dir):
+    rebuild(index_dir, 'b1')
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+    readers_dir = os.path.join(index_dir, vector_index.READERS_DIR)
+    os.makedirs(readers_dir)
+    open(os.path.join(readers_dir, f"b1.{socket.gethostname()}.{dead.pid}"), 'w').close()
+    open(os.path.join(readers_dir, "b1.other-host.1"), 'w').close()
+
+    rebuild(index_dir, 'b2')
+    # The other host's reader cannot be checked, so its build is kept
+    assert builds(index_dir) == ['b1', 'b2']
+    assert os.listdir(readers_dir) == ['b1.other-host.1']
+
+
+def test_hold_pinned_build_that_was_pruned(index_dir):
+    assert hold_build(persist_directory=index_dir) is None
+    with pytest.raises(FileNotFoundError):
+        hold_build(os.path.join(index_dir, 'builds', 'gone'), index_dir)
+
+
+def test_prebuilt_index_without_csv_is_not_stale(index_dir, tmp_path):
+    csv_path = str(tmp_path / 'processed_filings.csv')
+    assert vector_index.index_is_stale(csv_path, index_dir)
+    rebuild(index_dir, 'b1')
+    assert not vector_index.index_is_stale(csv_path, index_dir)